@@ -0,0 +1,42 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+
+# Read replica routing. ReadReplicaMiddleware (userapp.middleware) exposes the
+# current request here; GET/HEAD requests to a view with `read_replica = True`
+# read from a random replica, everything else (writes, migrations, other views,
+# management commands) uses the primary.
+current_request = ContextVar('current_request', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def reading_from_replica():
+    request = current_request.get()
+    if request is None or request.method not in SAFE_METHODS or not replica_aliases():
+        return False
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(match.func, 'view_class', None) if match else None
+    return getattr(view_class, 'read_replica', False)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(replica_aliases())
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    # replicas hold the same rows as the primary
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,94 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Structured logging (configured by settings.LOGGING): records get the request's
+# correlation id in the calling thread, are queued without blocking and are written
+# as redacted JSON lines by a background listener thread.
+
+request_id_var = ContextVar('request_id', default=None)
+
+# attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'request_id'}
+
+_SECRET_KEYS = re.compile(r'pass(word)?|token|secret|authorization|refresh|access|jti', re.IGNORECASE)
+_SECRET_VALUES = re.compile(r'(Bearer\s+)\S+|eyJ[\w-]+\.[\w-]+\.[\w-]+')
+REDACTED = '[REDACTED]'
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: REDACTED if _SECRET_KEYS.search(str(key)) else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str):
+        return _SECRET_VALUES.sub(REDACTED, value)
+    return value
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+# let through only a `rate` fraction of the records at or below max_level (high volume debug events)
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate=1.0, max_level='DEBUG'):
+        super().__init__()
+        self.rate = rate
+        self.max_level = logging.getLevelName(max_level)
+
+    def filter(self, record):
+        return record.levelno > self.max_level or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(redact(entry), default=str)
+
+
+# Non-blocking handler: enqueue the record (dropping it when QUEUE_SIZE records are
+# already waiting) and let a listener thread format and write it
+class QueueingHandler(QueueHandler):
+    def __init__(self, queue_size=10000, stream=None):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        # formatting happens in the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # same process: only resolve the message now, the record is formatted later
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -0,0 +1,101 @@
+import bisect
+import hmac
+import threading
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+
+
+# In-process request metrics (per worker process), collected by
+# userapp.middleware.MetricsMiddleware and served in the Prometheus text format.
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self.series.items()]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for labels, series in self.series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series):
+                    cumulative += count
+                    samples.append((f'{self.name}_bucket', labels + (('le', str(bound)),), cumulative))
+                samples.append((f'{self.name}_sum', labels, series[-1]))
+                samples.append((f'{self.name}_count', labels, cumulative))
+        return samples
+
+
+requests_total = Counter('http_requests_total', 'Requests by view, method and status')
+request_duration = Histogram('http_request_duration_seconds', 'Total request latency', LATENCY_BUCKETS)
+auth_duration = Histogram('http_request_auth_duration_seconds', 'Access token verification time', LATENCY_BUCKETS)
+db_duration = Histogram('http_request_db_duration_seconds', 'Time in SQL queries (sampled requests)', LATENCY_BUCKETS)
+db_queries = Histogram('http_request_db_queries', 'SQL queries per request (sampled requests)', QUERY_BUCKETS)
+render_duration = Histogram('http_request_render_duration_seconds', 'Response rendering time (sampled requests)', LATENCY_BUCKETS)
+
+METRICS = [requests_total, request_duration, auth_duration, db_duration, db_queries, render_duration]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for name, labels, value in metric.samples():
+            label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def scrape_allowed(request):
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = request.headers.get('Authorization', '')
+    return bool(settings.METRICS_TOKEN) and hmac.compare_digest(token.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode())
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from decouple import config
 
@@ -72,7 +73,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True,  # rotated refresh tokens go to userapp.revocation
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -85,8 +86,20 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Verified access token payloads kept by JWTPayloadMiddleware (LRU entries)
+JWT_PAYLOAD_CACHE_SIZE = 10000
+
+# Revoked tokens (userapp.revocation): bloom filter size (bits, hash functions) and
+# how often each process pulls the revocations made by the others (seconds)
+REVOCATION_BLOOM_BITS = 2 ** 20
+REVOCATION_BLOOM_HASHES = 4
+REVOCATION_SYNC_INTERVAL = 10
+
 
 MIDDLEWARE = [
+    'userapp.middleware.RequestIdMiddleware',
+    'userapp.middleware.MetricsMiddleware',
+    'userapp.middleware.ReadReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +108,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'userapp.middleware.JWTPayloadMiddleware',
 ]
 
 
@@ -102,6 +116,10 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  
 ]
 
+# response headers the frontend reads: tag search paging, rate limiting and
+# password hashing backoff, request correlation
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'Retry-After', 'X-Request-ID']
+
 
 
 
@@ -129,12 +147,77 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE picks the backend (sqlite3 by default, postgresql in production).
+# Connections are kept open for DB_CONN_MAX_AGE seconds and health checked before
+# reuse; on PostgreSQL DB_POOL uses psycopg's connection pool instead (the two
+# exclude each other, so CONN_MAX_AGE is 0 with the pool).
+DB_ENGINE = config('DB_ENGINE', default='sqlite3')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)  # seconds waiting for a free connection
+# SQLite: seconds a writer waits on the file lock, page cache size
+DB_SQLITE_TIMEOUT = config('DB_SQLITE_TIMEOUT', default=20, cast=int)
+DB_SQLITE_CACHE_KB = config('DB_SQLITE_CACHE_KB', default=20000, cast=int)
+# comma separated read replica hosts (same name and credentials as the primary),
+# used by the read-only views through myproject.db.ReadReplicaRouter
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=lambda v: [host.strip() for host in v.split(',') if host.strip()])
+# seconds a replica may trail the primary: reads this close to a write aren't cached
+DB_REPLICA_LAG = config('DB_REPLICA_LAG', default=2, cast=int)
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # readers no longer block on writers (WAL), writers take the lock up
+                # front instead of failing to upgrade it, and wait for it on contention.
+                # WAL is a property of the database file, set by its first connection.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    f'PRAGMA cache_size=-{DB_SQLITE_CACHE_KB};'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': DB_SQLITE_TIMEOUT,
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': config('DB_NAME', default='connectapp'),
+            'USER': config('DB_USER', default=''),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default=''),
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if DB_POOL and DB_ENGINE == 'postgresql':
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    for number, host in enumerate(DB_REPLICA_HOSTS, start=1):
+        DATABASES[f'replica{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['myproject.db.ReadReplicaRouter']
 
 
 # Password validation
@@ -173,7 +256,185 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# User directory (keyset pagination)
+USER_LIST_PAGE_SIZE = 50
+USER_LIST_MAX_PAGE_SIZE = 200
+
+# "People you may know": lists are rebuilt by the refresh_recommendations command
+# once older than RECOMMENDATION_REFRESH_AFTER (or after a follow/tag change) and
+# are not served once older than RECOMMENDATION_TTL
+RECOMMENDATION_LIMIT = 50
+RECOMMENDATION_MUTUAL_WEIGHT = 2
+RECOMMENDATION_TAG_WEIGHT = 1
+RECOMMENDATION_TAG_CANDIDATES = 1000
+RECOMMENDATION_REFRESH_AFTER = timedelta(hours=12)
+RECOMMENDATION_TTL = timedelta(days=2)
+
+# Follower/following lists (keyset pagination)
+FOLLOW_LIST_PAGE_SIZE = 50
+FOLLOW_LIST_MAX_PAGE_SIZE = 200
+
+# Max userIds per bulk follow/unfollow request
+FOLLOW_BULK_MAX_IDS = 100
+
+# Max target ids per relationship (follow button state) lookup
+RELATIONSHIP_MAX_IDS = 100
+
+# Home feed: posts of authors with more followers than this are merged at read
+# time instead of being fanned out to every follower's timeline on write
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_BACKFILL_POSTS = 50
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+# Tag search page length
+TAG_SEARCH_PAGE_SIZE = 20
+TAG_SEARCH_MAX_PAGE_SIZE = 100
+
+# Rows fetched and written per chunk by the ?stream=1 list responses (userapp.utils)
+STREAM_CHUNK_SIZE = config('STREAM_CHUNK_SIZE', default=500, cast=int)
+
+# Profile image uploads: spooled locally, stored by a bounded background worker pool.
+# userapp.uploads.LocalImageStorage keeps files under MEDIA_ROOT instead of cloudinary.
+IMAGE_STORAGE_BACKEND = config('IMAGE_STORAGE_BACKEND', default='userapp.uploads.CloudinaryImageStorage')
+UPLOAD_SPOOL_DIR = config('UPLOAD_SPOOL_DIR', default=str(BASE_DIR / 'upload_spool'))
+UPLOAD_WORKERS = 4
+UPLOAD_QUEUE_SIZE = 64
+
+# Resized variants produced for uploaded images (longest side in px), 'full' is required
+IMAGE_VARIANTS = {
+    'thumbnail': 150,
+    'medium': 640,
+    'full': 1600,
+}
+IMAGE_VARIANT_QUALITY = 82
+
+# Serve the hot read endpoints (user list, user by username, current user, tag search,
+# posts by owner) with the native async views on their regular urls. They are always
+# available under /api/async/ as well.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Read-through cache of serialized profiles and post lists (userapp.cache).
+# Local memory per process by default; point READ_CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) for multi-process deployments.
+READ_CACHE_BACKEND = config('READ_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reads': {
+        'BACKEND': READ_CACHE_BACKEND,
+        'LOCATION': config('READ_CACHE_LOCATION', default='connectapp-reads'),
+    },
+}
+if READ_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['reads']['OPTIONS'] = {'MAX_ENTRIES': 50000}
+READ_CACHE_ALIAS = 'reads'
+READ_CACHE_TIMEOUT = 300
+
+# Incremental post sync (?since=): deletes are kept as tombstones for this long,
+# older watermarks get a full reload
+POST_TOMBSTONE_RETENTION = timedelta(days=30)
+POST_SYNC_WATERMARK_LAG = 5  # seconds
+
+# Password hashing (userapp.hashers). PASSWORD_HASHER picks the hasher for new and
+# rehashed passwords: pbkdf2, scrypt or argon2 (argon2 needs argon2-cffi). Hashes made
+# with another hasher or other parameters are upgraded on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+# Cost parameters left unset follow the defaults of the installed Django's hashers (so
+# they rise with Django upgrades); setting one lower than the stored hashes' makes
+# logins rehash to that lower cost.
+def optional_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=None, cast=optional_int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=None, cast=optional_int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=None, cast=optional_int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=None, cast=optional_int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=None, cast=optional_int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=None, cast=optional_int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=None, cast=optional_int)
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'userapp.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'userapp.hashers.TunedScryptPasswordHasher',
+    'argon2': 'userapp.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# At most PASSWORD_HASH_WORKERS hashes run at once (one per core by default) and
+# PASSWORD_HASH_QUEUE_SIZE more may wait; beyond that logins get a 503
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASH_QUEUE_SIZE = config('PASSWORD_HASH_QUEUE_SIZE', default=32, cast=int)
+
+# Login/signup rate limiting (userapp.ratelimit): token buckets per client IP and per
+# email, RATE_LIMITS[scope][kind] = (capacity, period in seconds). Buckets live in
+# process memory; use userapp.ratelimit.CacheBucketStore to share them between the
+# processes of a host through the RATE_LIMIT_CACHE_BACKEND cache.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default='userapp.ratelimit.MemoryBucketStore')
+RATE_LIMIT_MAX_KEYS = 100000
+RATE_LIMITS = {
+    'login': {'ip': (20, 60), 'email': (5, 300)},
+    'signup': {'ip': (5, 3600)},
+}
+# number of trusted proxies in front of the app appending to X-Forwarded-For
+# (0: the header is ignored and buckets are keyed on REMOTE_ADDR)
+RATE_LIMIT_PROXY_HOPS = config('RATE_LIMIT_PROXY_HOPS', default=0, cast=int)
+CACHES['ratelimit'] = {
+    'BACKEND': config('RATE_LIMIT_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': config('RATE_LIMIT_CACHE_LOCATION', default='/tmp/connectapp-ratelimit'),
+}
+RATE_LIMIT_CACHE_ALIAS = 'ratelimit'
+
+# Structured logging (myproject.logs): JSON lines with the request id, written by a
+# background thread; DEBUG records are sampled, tokens and passwords are redacted
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=0.01, cast=float)
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'myproject.logs.JsonFormatter'},
+    },
+    'filters': {
+        'request_id': {'()': 'myproject.logs.RequestIdFilter'},
+        'sample_debug': {'()': 'myproject.logs.SamplingFilter', 'rate': LOG_DEBUG_SAMPLE_RATE},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'myproject.logs.QueueingHandler',
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json',
+            'filters': ['sample_debug', 'request_id'],
+        },
+    },
+    'loggers': {
+        'userapp': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+        'post': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# Request metrics (myproject.metrics), served at /metrics in the Prometheus text format.
+# SQL/render timings are recorded for a METRICS_SAMPLE_RATE fraction of the requests;
+# requests slower than METRICS_SLOW_REQUEST_MS (0 = off) are logged with their SQL
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_SAMPLE_RATE = config('METRICS_SAMPLE_RATE', default=0.1, cast=float)
+METRICS_SLOW_REQUEST_MS = config('METRICS_SLOW_REQUEST_MS', default=500, cast=int)
+METRICS_SLOW_SQL_LIMIT = 20
+# who may scrape /metrics: clients connecting from METRICS_ALLOWED_IPS (comma
+# separated, loopback by default) or sending `Authorization: Bearer <METRICS_TOKEN>`
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [ip.strip() for ip in v.split(',') if ip.strip()])
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
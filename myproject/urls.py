@@ -14,11 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path,include
+from myproject.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('userapp.urls')),
     path('api/', include('post.urls')),
+    # native async versions of the hot read endpoints
+    path('api/async/', include('userapp.async_urls')),
+    path('api/async/', include('post.async_urls')),
+    # request metrics in the Prometheus text format
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+# files written by the local image storage backend (development only)
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .async_views import AsyncGetPostsByOwnerEmailView
+
+urlpatterns = [
+    path('posts/owner/<str:email>/', AsyncGetPostsByOwnerEmailView.as_view(), name='async_get_posts_by_owner_email'),
+]
@@ -0,0 +1,54 @@
+from django.http import JsonResponse
+from django.views import View
+from userapp.models import User
+from userapp.cache import acached_read, IDENTITY, POSTS
+from .models import Post
+from .serializers import PostSerializer
+from .changes import parse_since, aowner_changes
+from userapp.utils import wants_stream, astream_json_array
+
+
+# Native async version of the posts-by-owner endpoint (Django async ORM, no DRF).
+# Served under /api/async/, or in place of the sync view when ASYNC_READ_VIEWS is on.
+class AsyncGetPostsByOwnerEmailView(View):
+    read_replica = True
+
+    async def get(self, request, email):
+        payload = request.jwt_payload
+        if payload is None:
+            return JsonResponse({'success': False, 'error': 'Invalid or missing token'}, status=401)
+
+        # incremental sync (?since=), same as the sync view
+        if 'since' in request.GET:
+            try:
+                since = parse_since(request.GET['since'])
+            except ValueError:
+                return JsonResponse({'success': False, 'error': 'Invalid since'}, status=400)
+            owner_id = await User.objects.filter(email=email).values_list('id', flat=True).afirst()
+            if owner_id is None:
+                return JsonResponse({'success': False, 'error': 'User not found'}, status=404)
+            return JsonResponse(await aowner_changes(owner_id, since))
+
+        # ?stream=1: the same list streamed from the database, bypassing the read cache
+        if wants_stream(request.GET):
+            owner_id = await User.objects.filter(email=email).values_list('id', flat=True).afirst()
+            if owner_id is None:
+                return JsonResponse({'success': False, 'error': 'User not found'}, status=404)
+            posts = Post.objects.filter(owner_id=owner_id, archived=False)
+            return astream_json_array(posts, PostSerializer().to_representation)
+
+        async def resolve():
+            return await User.objects.filter(email=email).values_list('id', flat=True).afirst()
+
+        async def load(owner_id):
+            if not await User.objects.filter(id=owner_id, email=email).aexists():
+                return None
+            # Fetch only non-archived posts created by the user
+            posts = [post async for post in Post.objects.filter(owner_id=owner_id, archived=False)]
+            return PostSerializer(posts, many=True).data
+
+        # same cache entry as the sync view
+        data = await acached_read(f'posts:email:{email}:active', [IDENTITY, POSTS], resolve, load)
+        if data is None:
+            return JsonResponse({'detail': 'No User matches the given query.'}, status=404)
+        return JsonResponse(data, safe=False)
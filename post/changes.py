@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Post, PostTombstone
+from .serializers import PostSerializer
+
+
+# Incremental sync of an owner's posts: everything created, updated, archived or
+# deleted after a watermark. Clients store the returned watermark and send it back
+# as ?since= on the next pull; replaying a change twice is harmless.
+
+
+# ?since= as ISO 8601 or unix seconds, raises ValueError when it is neither
+def parse_since(value):
+    try:
+        return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    since = parse_datetime(value or '')
+    if since is None:
+        raise ValueError('Invalid since')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+# the next watermark lags behind now so rows committed by in-flight writes are not skipped
+def next_watermark():
+    return timezone.now() - timedelta(seconds=settings.POST_SYNC_WATERMARK_LAG)
+
+
+# tombstones are pruned after POST_TOMBSTONE_RETENTION, older watermarks need a full reload
+def needs_reset(since):
+    return since < timezone.now() - settings.POST_TOMBSTONE_RETENTION
+
+
+def changes_response(watermark, posts, deleted_ids, reset=False):
+    return {
+        'changed': PostSerializer(posts, many=True).data,
+        'deleted': deleted_ids,
+        'watermark': watermark.isoformat(),
+        'reset': reset,
+    }
+
+
+def owner_changes(owner_id, since):
+    watermark = next_watermark()
+    if needs_reset(since):
+        return changes_response(watermark, Post.objects.filter(owner_id=owner_id), [], reset=True)
+
+    posts = Post.objects.filter(owner_id=owner_id, updated_at__gt=since)
+    deleted_ids = PostTombstone.objects.filter(owner_id=owner_id, deleted_at__gt=since).values_list('post_id', flat=True)
+    return changes_response(watermark, posts, list(deleted_ids))
+
+
+async def aowner_changes(owner_id, since):
+    watermark = next_watermark()
+    if needs_reset(since):
+        posts = [post async for post in Post.objects.filter(owner_id=owner_id)]
+        return changes_response(watermark, posts, [], reset=True)
+
+    posts = [post async for post in Post.objects.filter(owner_id=owner_id, updated_at__gt=since)]
+    deleted = PostTombstone.objects.filter(owner_id=owner_id, deleted_at__gt=since).values_list('post_id', flat=True)
+    return changes_response(watermark, posts, [post_id async for post_id in deleted])
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from .models import Post, TimelineEntry
+from userapp.models import User
+from userapp.follow_graph import FollowEdge
+
+
+def is_fanout_author(author_id):
+    followers_count = User.objects.filter(id=author_id).values_list('followersCount', flat=True).first()
+    return followers_count is not None and followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def add_timeline_entries(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+# fan-out-on-write: push a new (or unarchived) post into its author's followers' timelines
+def fan_out_post(post):
+    if post.archived or not is_fanout_author(post.owner_id):
+        return
+
+    follower_ids = FollowEdge.objects.filter(from_user_id=post.owner_id).values_list('to_user_id', flat=True)
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=1000):
+        batch.append(TimelineEntry(user_id=follower_id, post_id=post.id, author_id=post.owner_id))
+        if len(batch) >= 1000:
+            add_timeline_entries(batch)
+            batch = []
+    add_timeline_entries(batch)
+
+
+# remove an archived post from every timeline (deleted posts go away by cascade)
+def retract_post(post):
+    TimelineEntry.objects.filter(post_id=post.id).delete()
+
+
+# on follow: seed the follower's timeline with the authors' most recent posts,
+# FEED_BACKFILL_POSTS per author in one query
+def backfill_authors(follower_id, author_ids):
+    author_ids = User.objects.filter(
+        id__in=author_ids, followersCount__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('id', flat=True)
+    recent = (
+        Post.objects.filter(owner_id__in=list(author_ids), archived=False)
+        .annotate(rank=Window(RowNumber(), partition_by=F('owner_id'), order_by=F('id').desc()))
+        .filter(rank__lte=settings.FEED_BACKFILL_POSTS)
+        .values_list('id', 'owner_id')
+    )
+    add_timeline_entries([TimelineEntry(user_id=follower_id, post_id=post_id, author_id=owner_id) for post_id, owner_id in recent])
+
+
+def backfill_author(follower_id, author_id):
+    backfill_authors(follower_id, [author_id])
+
+
+# on unfollow: drop the authors' posts from the follower's timeline
+def drop_authors(follower_id, author_ids):
+    TimelineEntry.objects.filter(user_id=follower_id, author_id__in=author_ids).delete()
+
+
+def drop_author(follower_id, author_id):
+    drop_authors(follower_id, [author_id])
+
+
+# newest-first page of the user's home feed, posts with id < before_id
+# returns (posts, has_more)
+def get_feed_page(user_id, before_id, page_size):
+    entries = TimelineEntry.objects.filter(user_id=user_id, post__archived=False).select_related('post')
+    if before_id is not None:
+        entries = entries.filter(post_id__lt=before_id)
+    posts = {entry.post_id: entry.post for entry in entries.order_by('-post_id')[:page_size + 1]}
+
+    # fan-out-on-read for the high-follower accounts the user follows
+    pulled_author_ids = FollowEdge.objects.filter(
+        to_user_id=user_id,
+        from_user__followersCount__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('from_user_id', flat=True)
+    pulled = Post.objects.filter(owner_id__in=pulled_author_ids, archived=False)
+    if before_id is not None:
+        pulled = pulled.filter(id__lt=before_id)
+    for post in pulled.order_by('-id')[:page_size + 1]:
+        posts.setdefault(post.id, post)
+
+    page = [posts[post_id] for post_id in sorted(posts, reverse=True)]
+    return page[:page_size], len(page) > page_size
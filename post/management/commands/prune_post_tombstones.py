@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from post.models import PostTombstone
+
+
+# Delete the post tombstones older than POST_TOMBSTONE_RETENTION; sync clients
+# with an older watermark get a full reload instead
+class Command(BaseCommand):
+    help = 'Delete post tombstones older than POST_TOMBSTONE_RETENTION'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.POST_TOMBSTONE_RETENTION
+        deleted, _ = PostTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones'))
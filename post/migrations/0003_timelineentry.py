@@ -0,0 +1,50 @@
+# Generated by Django 5.1 on 2026-10-18 14:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# fan out the existing non-archived posts into their followers' timelines
+def build_timelines(apps, schema_editor):
+    Post = apps.get_model('post', 'Post')
+    TimelineEntry = apps.get_model('post', 'TimelineEntry')
+    User = apps.get_model('userapp', 'User')
+    FollowEdge = User.followers.through
+
+    posts = Post.objects.filter(
+        archived=False,
+        owner__followersCount__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('id', 'owner_id')
+    for post_id, owner_id in posts.iterator():
+        follower_ids = FollowEdge.objects.filter(from_user_id=owner_id).values_list('to_user_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=follower_id, post_id=post_id, author_id=owner_id) for follower_id in follower_ids],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0002_alter_post_phone'),
+        ('userapp', '0007_alter_user_profileimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='userapp.user')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='post.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='userapp.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'author'], name='timeline_user_author_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'post'), name='timeline_user_post_uniq')],
+            },
+        ),
+        migrations.RunPython(build_timelines, migrations.RunPython.noop),
+    ]
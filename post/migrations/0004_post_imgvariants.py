@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0003_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='imgVariants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0004_post_imgvariants'),
+        ('userapp', '0010_user_profileimagevariants'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['owner', '-id'], name='post_owner_active_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('archived', True)), fields=['owner', '-id'], name='post_owner_archived_id_idx'),
+        ),
+    ]
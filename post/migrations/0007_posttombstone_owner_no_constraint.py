@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0006_post_timestamps_tombstones'),
+        ('userapp', '0015_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='posttombstone',
+            name='owner',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='userapp.user'),
+        ),
+    ]
@@ -6,8 +6,58 @@ class Post(models.Model):
     address = models.CharField(max_length=255)
     phone = models.CharField(max_length=25)
     imgUrl = models.URLField(max_length=500)
+    imgVariants = models.JSONField(default=dict, blank=True)  # {'thumbnail': url, 'medium': url, 'full': url}
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     archived = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # newest first. The owner post lists filter on (owner, archived) and read straight
+        # off one of these indexes in order, without a sort step. They are partial on
+        # archived because Django renders archived=False as `NOT archived`, which
+        # SQLite can't match against an (owner, archived, id) column index.
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['owner', '-id'], condition=models.Q(archived=False), name='post_owner_active_id_idx'),
+            models.Index(fields=['owner', '-id'], condition=models.Q(archived=True), name='post_owner_archived_id_idx'),
+            # incremental sync: changes of an owner's posts since a watermark
+            models.Index(fields=['owner', 'updated_at'], name='post_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+# Precomputed home timeline: one row per (follower, post) for fanned-out posts.
+# Posts of high-follower accounts are not fanned out, they are merged at read time.
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='timeline_user_post_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+
+# Marker left behind by a deleted post so incremental sync clients can drop it
+class PostTombstone(models.Model):
+    post_id = models.BigIntegerField()
+    # no database constraint: deleting a user cascades to their posts, and the
+    # tombstones written for them must not block the user row from going away
+    owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'deleted_at'], name='tombstone_owner_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}'
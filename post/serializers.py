@@ -5,4 +5,12 @@ from .models import Post
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = ['id', 'name', 'address', 'phone', 'imgUrl', 'owner', 'archived']
+        fields = ['id', 'name', 'address', 'phone', 'imgUrl', 'imgVariants', 'owner', 'archived', 'created_at', 'updated_at']
+        read_only_fields = ['imgVariants', 'created_at', 'updated_at']
+        extra_kwargs = {'imgUrl': {'required': False}}
+
+    def validate(self, attrs):
+        # imgUrl may only be left out when an image file is uploaded with the post
+        if self.instance is None and not attrs.get('imgUrl') and not self.context.get('image_upload'):
+            raise serializers.ValidationError({'imgUrl': ['This field is required.']})
+        return attrs
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from userapp.models import User
+from userapp.cache import POSTS, invalidate_on_commit
+from .models import Post, PostTombstone
+
+
+# read cache invalidation for the owner's post lists (see userapp.cache)
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    invalidate_on_commit([POSTS], [instance.owner_id])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_on_commit([POSTS], [instance.owner_id])
+
+
+# leave a tombstone for incremental sync clients (see post.changes), except when
+# the posts go because their owner is deleted: nobody syncs that owner any more
+@receiver(post_delete, sender=Post)
+def post_tombstone(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    PostTombstone.objects.create(post_id=instance.id, owner_id=instance.owner_id)
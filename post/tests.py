@@ -1,3 +1,253 @@
-from django.test import TestCase
+import itertools
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from unittest import skipUnless
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from userapp.models import User
+from userapp.follow_graph import FollowEdge
+from .models import Post, PostTombstone, TimelineEntry
 
-# Create your tests here.
+
+# Guards the indexes behind the owner post lists: the queries must search an
+# owner index and come out in order without a sort step
+@skipUnless(connection.vendor == 'sqlite', 'checks the SQLite query plan')
+class OwnerPostsQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            firstName='Test', lastName='User', username='owner', email='owner@example.com',
+            phone='1234567890', password='x',
+        )
+        Post.objects.bulk_create([
+            Post(name=f'post {i}', address='address', phone='1', imgUrl='https://example.com/a.png',
+                 owner=cls.user, archived=i % 3 == 0)
+            for i in range(30)
+        ])
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_active_posts_by_owner(self):
+        self.assertUsesIndex(Post.objects.filter(owner=self.user, archived=False), 'post_owner_active_id_idx')
+
+    def test_archived_posts_by_owner(self):
+        self.assertUsesIndex(Post.objects.filter(owner=self.user, archived=True), 'post_owner_archived_id_idx')
+
+    def test_owner_posts_are_newest_first(self):
+        ids = list(Post.objects.filter(owner=self.user, archived=False).values_list('id', flat=True))
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+
+# Deleting a post leaves a tombstone for sync clients; deleting its owner must still
+# commit (TransactionTestCase, so the foreign keys are checked at commit)
+class PostTombstoneTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            firstName='Test', lastName='User', username='owner', email='owner@example.com',
+            phone='1234567890', password='x',
+        )
+        self.post = Post.objects.create(name='post', address='address', phone='1', imgUrl='https://example.com/a.png', owner=self.user)
+
+    def test_deleting_a_post_leaves_a_tombstone(self):
+        post_id = self.post.id
+        self.post.delete()
+        self.assertTrue(PostTombstone.objects.filter(post_id=post_id, owner_id=self.user.id).exists())
+
+    def test_deleting_an_owner_with_posts(self):
+        self.user.delete()
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Post.objects.exists())
+
+
+phones = itertools.count(5560000000)
+
+
+def make_user(name):
+    return User.objects.create(
+        firstName='Test', lastName='User', username=name, email=f'{name}@example.com',
+        phone=str(next(phones)), password='x',
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+# Home feed: fan-out on write below FEED_FANOUT_MAX_FOLLOWERS, fan-out on read above,
+# timelines kept in sync with follows, unfollows and the archive status
+class FeedTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        self.author_client = client_for(self.author)
+        self.reader_client = client_for(self.reader)
+
+    def follow(self):
+        response = self.reader_client.post('/api/users/follow/', {'userId': self.author.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def create_post(self, name='post'):
+        response = self.author_client.post('/api/posts/create/', {
+            'name': name, 'address': 'address', 'phone': '1', 'imgUrl': 'https://example.com/a.png',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def feed_ids(self, **params):
+        response = self.reader_client.get('/api/feed/', params)
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['posts']]
+
+    def timeline_ids(self):
+        return list(TimelineEntry.objects.filter(user=self.reader).order_by('-post_id').values_list('post_id', flat=True))
+
+    def test_fan_out_on_create(self):
+        self.follow()
+        post_id = self.create_post()
+        self.assertEqual(self.timeline_ids(), [post_id])
+        self.assertEqual(self.feed_ids(), [post_id])
+
+    def test_archive_retracts_the_post(self):
+        self.follow()
+        post_id = self.create_post()
+        response = self.author_client.patch(f'/api/posts/archive/{post_id}/', {'archived': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timeline_ids(), [])
+        self.assertEqual(self.feed_ids(), [])
+
+        self.author_client.patch(f'/api/posts/archive/{post_id}/', {'archived': False}, format='json')
+        self.assertEqual(self.feed_ids(), [post_id])
+
+    def test_update_of_the_archive_status(self):
+        self.follow()
+        post_id = self.create_post()
+        response = self.author_client.put(f'/api/posts/{post_id}/', {'archived': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timeline_ids(), [])
+
+        self.author_client.put(f'/api/posts/{post_id}/', {'archived': False}, format='json')
+        self.assertEqual(self.timeline_ids(), [post_id])
+
+    def test_only_the_owner_changes_a_post(self):
+        post_id = self.create_post()
+        self.assertEqual(self.reader_client.put(f'/api/posts/{post_id}/', {'name': 'x'}, format='json').status_code, 403)
+        self.assertEqual(self.reader_client.patch(f'/api/posts/archive/{post_id}/', {'archived': True}, format='json').status_code, 403)
+        self.assertEqual(self.reader_client.delete(f'/api/posts/delete/{post_id}/').status_code, 403)
+
+    def test_delete_decrements_the_post_count(self):
+        post_id = self.create_post()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.postsCount, 1)
+        self.assertEqual(self.author_client.delete(f'/api/posts/delete/{post_id}/').status_code, 200)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.postsCount, 0)
+        self.assertFalse(Post.objects.filter(id=post_id).exists())
+
+    def test_backfill_on_follow(self):
+        first, second = self.create_post('first'), self.create_post('second')
+        self.assertEqual(self.feed_ids(), [])
+        self.follow()
+        self.assertEqual(self.feed_ids(), [second, first])
+
+    def test_drop_on_unfollow(self):
+        self.follow()
+        self.create_post()
+        response = self.reader_client.post('/api/users/unfollow/', {'userId': self.author.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timeline_ids(), [])
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_fan_out_on_read_above_the_follower_limit(self):
+        self.follow()
+        post_id = self.create_post()
+        self.assertEqual(self.timeline_ids(), [])
+        self.assertEqual(self.feed_ids(), [post_id])
+
+    def test_cursor_paging(self):
+        self.follow()
+        post_ids = [self.create_post(f'post {i}') for i in range(5)]
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            response = self.reader_client.get('/api/feed/', params)
+            seen += [post['id'] for post in response.data['posts']]
+            if response.data['next'] is None:
+                break
+            params = {'page_size': 2, 'cursor': response.data['next']}
+        self.assertEqual(seen, sorted(post_ids, reverse=True))
+
+
+# The sync and the native async posts-by-owner views answer alike
+class PostsByOwnerViewsTests(TestCase):
+    def setUp(self):
+        self.owner = make_user('owner')
+        Post.objects.create(name='post', address='address', phone='1', imgUrl='https://example.com/a.png', owner=self.owner)
+        self.token = str(RefreshToken.for_user(self.owner).access_token)
+
+    def both(self, path):
+        sync = client_for(self.owner).get(f'/api{path}')
+        asynchronous = async_to_sync(AsyncClient().get)(f'/api/async{path}', headers={'Authorization': f'Bearer {self.token}'})
+        return (sync.status_code, sync.json()), (asynchronous.status_code, asynchronous.json())
+
+    def test_same_answers(self):
+        for path in ('/posts/owner/owner@example.com/', '/posts/owner/nobody@example.com/'):
+            sync, asynchronous = self.both(path)
+            self.assertEqual(sync, asynchronous)
+        self.assertEqual(sync[0], 404)
+
+    def test_archived_posts_of_an_unknown_owner(self):
+        response = client_for(self.owner).get('/api/posts/archived/owner/nobody@example.com/')
+        self.assertEqual(response.status_code, 404)
+
+
+# Incremental sync (?since=): changes after the watermark, tombstones of deleted posts
+class PostChangesTests(TestCase):
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.client = client_for(self.owner)
+        self.posts = [
+            Post.objects.create(name=f'post {i}', address='address', phone='1', imgUrl='https://example.com/a.png', owner=self.owner)
+            for i in range(3)
+        ]
+        # synced long ago
+        Post.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def changes(self, since):
+        response = self.client.get('/api/posts/owner/owner@example.com/', {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_watermark_round_trip(self):
+        first = self.changes((timezone.now() - timedelta(hours=2)).isoformat())
+        self.assertEqual(sorted(post['id'] for post in first['changed']), sorted(post.id for post in self.posts))
+        self.assertFalse(first['reset'])
+
+        unchanged, archived, deleted = self.posts
+        self.client.patch(f'/api/posts/archive/{archived.id}/', {'archived': True}, format='json')
+        self.client.delete(f'/api/posts/delete/{deleted.id}/')
+
+        second = self.changes(first['watermark'])
+        self.assertEqual([(post['id'], post['archived']) for post in second['changed']], [(archived.id, True)])
+        self.assertEqual(second['deleted'], [deleted.id])
+
+    def test_unix_seconds(self):
+        since = (timezone.now() - timedelta(hours=2)).timestamp()
+        self.assertEqual(len(self.changes(str(since))['changed']), 3)
+
+    def test_expired_watermark_resets(self):
+        data = self.changes((timezone.now() - timedelta(days=365)).isoformat())
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['changed']), 3)
+
+    def test_invalid_since(self):
+        for path in ('/api/posts/owner/owner@example.com/', '/api/async/posts/owner/owner@example.com/'):
+            self.assertEqual(self.client.get(path, {'since': 'yesterday'}).status_code, 400)
@@ -1,7 +1,14 @@
 # In post/urls.py
+from django.conf import settings
 from django.urls import path
 from .views import CreatePostView, UpdatePostView, GetPostsByOwnerEmailView, GetPostsByUsernameView
 from .views import DeletePostView, ArchivePostView, GetArchivedPostsByOwnerEmailView
+from .views import FeedView
+from . import async_views
+
+# posts by owner is served by the native async view when ASYNC_READ_VIEWS is on
+if settings.ASYNC_READ_VIEWS:
+    GetPostsByOwnerEmailView = async_views.AsyncGetPostsByOwnerEmailView
 
 urlpatterns = [
     path('posts/create/', CreatePostView.as_view(), name='create_post'),
@@ -10,4 +17,5 @@ urlpatterns = [
     path('posts/owner/<str:email>/', GetPostsByOwnerEmailView.as_view(), name='get_posts_by_owner_email'),
     path('posts/archive/<int:id>/', ArchivePostView.as_view(), name='archive-post'),
     path('posts/archived/owner/<str:email>/', GetArchivedPostsByOwnerEmailView.as_view(), name='archived-posts-by-owner-email'),
+    path('feed/', FeedView.as_view(), name='feed'),
 ]
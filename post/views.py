@@ -6,40 +6,93 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import Post
 from .serializers import PostSerializer
+from .feed import fan_out_post, retract_post, get_feed_page
+from .changes import parse_since, owner_changes
 from userapp.models import User 
-from userapp.utils import decode_token 
+from userapp.utils import encode_cursor, decode_cursor, get_page_size, wants_stream, stream_json_array
+from userapp.counters import adjust_counters
+from userapp.uploads import submit_image_upload, UploadQueueFull
+from userapp.cache import cached_read, invalidate, IDENTITY, POSTS
+import logging
+from functools import partial
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import Http404
+
+
+logger = logging.getLogger(__name__)
+
+
+# store the resized image variants of a post (runs in the upload worker)
+def set_post_image(post_id, owner_id, urls):
+    Post.objects.filter(id=post_id).update(imgUrl=urls['full'], imgVariants=urls, updated_at=timezone.now())
+    invalidate([POSTS], [owner_id])
+
+
+# serialized posts of the owner with this email, from the read cache
+# (valid until the owner's posts or email change)
+def cached_owner_posts(email, archived):
+    def resolve():
+        # Find the user by email
+        return User.objects.filter(email=email).values_list('id', flat=True).first()
+
+    def load(owner_id):
+        if not User.objects.filter(id=owner_id, email=email).exists():
+            return None
+        posts = Post.objects.filter(owner_id=owner_id, archived=archived)
+        return PostSerializer(posts, many=True).data
+
+    key = f"posts:email:{email}:{'archived' if archived else 'active'}"
+    posts = cached_read(key, [IDENTITY, POSTS], resolve, load)
+    if posts is None:
+        raise Http404('No User matches the given query.')
+    return posts
 
 
 # VIEW FOR CREATING A POST BY A USER
 class CreatePostView(APIView):
     def post(self, request):
-        payload = decode_token(request)
+        payload = request.jwt_payload
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
         
         # owner koh current user set krdo
-        request.data['owner'] = payload['user_id']  
+        data = {key: value for key, value in request.data.items() if key != 'image'}
+        data['owner'] = payload['user_id']
+
+        # optional image file, resized and stored in the background (imgUrl is then filled in)
+        image = request.FILES.get('image')
 
-        serializer = PostSerializer(data=request.data)
+        serializer = PostSerializer(data=data, context={'image_upload': image is not None})
         if serializer.is_valid():
-            serializer.save()
-            try:
+            with transaction.atomic():
+                post = serializer.save()
                 # user ka post count increase kr denge
-                user = User.objects.get(id=payload['user_id'])
-                user.postsCount += 1
-                user.save()
-            except User.DoesNotExist:
-                print('User not found')
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+                adjust_counters([post.owner_id], postsCount=1)
+
+            response_data = serializer.data
+            if image is not None:
+                try:
+                    job = submit_image_upload(post.owner_id, image, partial(set_post_image, post.id, post.owner_id))
+                except UploadQueueFull:
+                    with transaction.atomic():
+                        post.delete()
+                        adjust_counters([post.owner_id], postsCount=-1)
+                    return Response({'success': False, 'error': 'Upload queue is full, try again later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                response_data = {**response_data, 'imageJobId': str(job.id)}
+
+            fan_out_post(post)
+            return Response(response_data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
 # VIEW FOR UPDATING A POST 
 class UpdatePostView(APIView):
     def put(self, request, id):
-        payload = decode_token(request)
+        payload = request.jwt_payload
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -47,56 +100,82 @@ class UpdatePostView(APIView):
         post = get_object_or_404(Post, id=id)
         
         # Check if the current user is the owner of the post
-        if post.owner.id != payload['user_id']:
+        if post.owner_id != int(payload['user_id']):
             return Response({'success': False, 'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
         # Update the post with the new data
         # partial=True allows partial updates
         serializer = PostSerializer(post, data=request.data, partial=True)  
         if serializer.is_valid():
+            was_archived = post.archived
             serializer.save()
+
+            # keep the followers' timelines in sync when the archive status changed
+            if post.archived != was_archived:
+                if post.archived:
+                    retract_post(post)
+                else:
+                    fan_out_post(post)
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
 # VIEW FOR FETCHING ALL THE POST CREATED BY THE USER THROUGH THE EMAIL
+# with ?since=<watermark> only the posts created/updated/archived/deleted after it,
+# with ?stream=1 as a streaming response
 class GetPostsByOwnerEmailView(APIView):
+    read_replica = True
+
     def get(self, request, email):
-        # Decode JWT and verify user
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
         
         try:
-            # Print for debugging
-            print('Requested Email:', email)
+            logger.debug('posts by owner email requested', extra={'email': email})
             if not email:
                 return Response({'success': False, 'error': 'Email parameter not provided'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Find the user by email
-            user = get_object_or_404(User, email=email)
-            
+            # incremental sync
+            if 'since' in request.query_params:
+                try:
+                    since = parse_since(request.query_params['since'])
+                except ValueError:
+                    return Response({'success': False, 'error': 'Invalid since'}, status=status.HTTP_400_BAD_REQUEST)
+                owner_id = User.objects.filter(email=email).values_list('id', flat=True).first()
+                if owner_id is None:
+                    return Response({'success': False, 'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+                return Response(owner_changes(owner_id, since), status=status.HTTP_200_OK)
+
+            # ?stream=1: the same list streamed from the database, bypassing the read cache
+            if wants_stream(request.query_params):
+                owner_id = User.objects.filter(email=email).values_list('id', flat=True).first()
+                if owner_id is None:
+                    return Response({'success': False, 'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+                posts = Post.objects.filter(owner_id=owner_id, archived=False)
+                return stream_json_array(posts, PostSerializer().to_representation)
+
             # Fetch only non-archived posts created by the user
-            posts = Post.objects.filter(owner=user, archived=False)
-            
-            # Serialize the posts data
-            serializer = PostSerializer(posts, many=True)
-            
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
+            return Response(cached_owner_posts(email, archived=False), status=status.HTTP_200_OK)
+
+        except Http404 as error:
+            return Response({'detail': str(error)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as error:
-            print('Error fetching posts by owner email:', error)
+            logger.exception('error fetching posts by owner email', extra={'email': email})
             return Response({'success': False, 'error': 'Error fetching posts', 'message': str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 # VIEW FOR FETCHIGN ALL THE POST CREATED BY USER THROUGH THE USERNAME 
 class GetPostsByUsernameView(APIView):
+    read_replica = True
+
     def get(self, request, username):
-        # Decode JWT and verify user
-        payload = decode_token(request)
-        print("payload is " , payload)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
+        logger.debug('posts by username requested', extra={'username': username, 'payload': payload})
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
         
@@ -113,15 +192,15 @@ class GetPostsByUsernameView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         except Exception as error:
-            print('Error fetching posts by username:', error)
+            logger.exception('error fetching posts by username', extra={'username': username})
             return Response({'success': False, 'error': 'Error fetching posts', 'message': str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 # VIEW FOR DELETING A POST MADE BY THE USER
 class DeletePostView(APIView):
     def delete(self, request, id):
-        payload = decode_token(request)
-        print("Payload is ", payload)
+        payload = request.jwt_payload
+        logger.debug('post delete requested', extra={'post_id': id, 'payload': payload})
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -131,16 +210,14 @@ class DeletePostView(APIView):
             post = get_object_or_404(Post, id=id)
             
             # check if the logged-in user is the owner of the post
-            if post.owner.id != payload['user_id']:
+            if post.owner_id != int(payload['user_id']):
                 return Response({'success': False, 'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
             
-            # delete the post
-            post.delete()
-            
-            # find user and decrement the post count
-            user = get_object_or_404(User, id=payload['user_id'])
-            user.postsCount = max(0, user.postsCount - 1)  # Decrement post count but ensure it doesn't go negative
-            user.save()
+            # delete the post and decrement the owner's post count (never below zero)
+            owner_id = post.owner_id
+            with transaction.atomic():
+                post.delete()
+                adjust_counters([owner_id], postsCount=-1)
             
             return Response({'success': True, 'message': 'Post deleted'}, status=status.HTTP_200_OK)
         
@@ -151,8 +228,8 @@ class DeletePostView(APIView):
 # VIEW FOR ARCHIVE PAGE, SHOWING ALL THE POST THAT ARE ARCHIVED
 class ArchivePostView(APIView):
     def patch(self, request, id):
-        payload = decode_token(request)
-        print("payload is : ", payload)
+        payload = request.jwt_payload
+        logger.debug('post archive requested', extra={'post_id': id, 'payload': payload})
 
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -164,60 +241,72 @@ class ArchivePostView(APIView):
                 return Response({'message': 'Post not found'}, status=status.HTTP_404_NOT_FOUND)
             
             # Check if the logged-in user is the owner of the post
-            if post.owner.id != payload['user_id']:
+            if post.owner_id != int(payload['user_id']):
                 return Response({'success': False, 'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
             
             # Update the archived status
             archived = request.data.get('archived')
-            print("archive status : ", request.data.get('archived'))
+            logger.debug('post archive status', extra={'post_id': id, 'archived': archived})
             if archived is None or not isinstance(archived, bool):
                 return Response({'message': 'Invalid archived status'}, status=status.HTTP_400_BAD_REQUEST)
             
             post.archived = archived
-            post.save()
+            post.save(update_fields=['archived', 'updated_at'])
+
+            # keep the followers' timelines in sync with the archive status
+            if archived:
+                retract_post(post)
+            else:
+                fan_out_post(post)
             
             # Serialize the updated post
             serializer = PostSerializer(post)
             return Response({'message': 'Post updated successfully', 'post': serializer.data}, status=status.HTTP_200_OK)
         
         except Exception as error:
-            print('Error updating post archive status:', error)
+            logger.exception('error updating post archive status', extra={'post_id': id})
             return Response({'success': False, 'error': 'Error updating post archive status', 'message': str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 # VIEW FOR FETCHING ARCHIVED POST CREATED BY THE USER
 class GetArchivedPostsByOwnerEmailView(APIView):
+    read_replica = True
+
     def get(self, request, email):
-        # Decode JWT and verify user
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            # Find the user by email
-            user = get_object_or_404(User, email=email)
-            
             # Fetch archived posts created by the user
-            posts = Post.objects.filter(owner=user, archived=True)
-            
-            # Serialize the posts data
-            serializer = PostSerializer(posts, many=True)
-            
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
+            return Response(cached_owner_posts(email, archived=True), status=status.HTTP_200_OK)
+
+        except Http404 as error:
+            return Response({'detail': str(error)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as error:
-            print('Error fetching archived posts by owner email:', error)
+            logger.exception('error fetching archived posts by owner email', extra={'email': email})
             return Response({'success': False, 'error': 'Error fetching archived posts', 'message': str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# VIEW FOR THE HOME FEED: NON-ARCHIVED POSTS OF EVERYONE THE USER FOLLOWS, NEWEST FIRST
+class FeedView(APIView):
+    def get(self, request):
+        payload = request.jwt_payload
 
+        if payload is None:
+            return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
 
+        try:
+            cursor = decode_cursor(request.query_params.get('cursor'))
+            before_id = int(cursor[0]) if cursor else None
+            page_size = get_page_size(request.query_params, settings.FEED_PAGE_SIZE, settings.FEED_MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return Response({'success': False, 'error': 'Invalid cursor or page_size'}, status=status.HTTP_400_BAD_REQUEST)
 
+        posts, has_more = get_feed_page(payload['user_id'], before_id, page_size)
+        next_cursor = encode_cursor(posts[-1].id) if has_more else None
 
-
-
-
-
-
-
+        serializer = PostSerializer(posts, many=True)
+        return Response({'posts': serializer.data, 'next': next_cursor}, status=status.HTTP_200_OK)
@@ -0,0 +1,10 @@
+from django.urls import path
+from .async_views import AsyncUserListView, AsyncUserByUsername, AsyncCurrentUserProfileView
+from .async_views import AsyncSearchUsersByTagView
+
+urlpatterns = [
+    path('all-users/', AsyncUserListView.as_view(), name='async_user_list'),
+    path('user/', AsyncCurrentUserProfileView.as_view(), name='async_current_user_profile'),
+    path('users/searchtag/<str:tag>/', AsyncSearchUsersByTagView.as_view(), name='async_search_users_by_tag'),
+    path('users/<str:username>/', AsyncUserByUsername.as_view(), name='async_user_by_username'),
+]
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from userapp.models import User
+from userapp.serializers import UserSerializer
+from userapp.cache import acached_read, PROFILE, IDENTITY
+from userapp.tags import search_users_by_tag
+from userapp.uploads import profile_image_url
+from userapp.utils import encode_cursor, decode_cursor, get_page_size, wants_stream, astream_json_array, dump_json
+from userapp.views import UserListView
+
+
+# Native async versions of the hot read endpoints (Django async ORM, no DRF).
+# Served under /api/async/, or in place of the sync views when ASYNC_READ_VIEWS is on.
+
+
+def async_response(success, data=None, error=None, status_code=200):
+    if success:
+        return JsonResponse({'success': True, 'data': data}, status=status_code)
+    return JsonResponse({'success': False, 'error': error}, status=status_code)
+
+
+def invalid_token_response():
+    return async_response(False, error='Invalid or missing token', status_code=401)
+
+
+# User list, keyset paginated on id (same parameters as UserListView)
+class AsyncUserListView(View):
+    read_replica = True
+
+    async def get(self, request):
+        payload = request.jwt_payload
+        if payload is None:
+            return invalid_token_response()
+
+        try:
+            cursor = decode_cursor(request.GET.get('cursor'))
+            after_id = int(cursor[0]) if cursor else None
+            page_size = get_page_size(request.GET, settings.USER_LIST_PAGE_SIZE, settings.USER_LIST_MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return async_response(False, error='Invalid cursor or page_size', status_code=400)
+
+        queryset = User.objects.only(*UserListView.light_fields, 'profileImageVariants').order_by('id')
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+        context = {'image_variant': request.GET.get('image', 'thumbnail')}
+
+        # ?stream=1: every user after the cursor, same body without paging
+        if wants_stream(request.GET):
+            serializer = UserSerializer(fields=UserListView.light_fields, context=context)
+            prefix = '{"success":true,"data":{"payload":' + dump_json(payload) + ',"next":null,"users":'
+            return astream_json_array(queryset, serializer.to_representation, prefix=prefix, suffix='}}')
+
+        users = [user async for user in queryset[:page_size + 1]]
+        next_cursor = encode_cursor(users[page_size - 1].id) if len(users) > page_size else None
+        users = users[:page_size]
+
+        data = UserSerializer(users, many=True, fields=UserListView.light_fields, context=context).data
+        return async_response(True, data={'users': data, 'next': next_cursor, 'payload': payload})
+
+
+# user by username
+class AsyncUserByUsername(View):
+    read_replica = True
+
+    async def get(self, request, username):
+        payload = request.jwt_payload
+        if payload is None:
+            return invalid_token_response()
+
+        async def resolve():
+            return await User.objects.filter(username=username).values_list('id', flat=True).afirst()
+
+        async def load(user_id):
+            user = await User.objects.filter(id=user_id, username=username).afirst()
+            return UserSerializer(user).data if user else None
+
+        data = await acached_read(f'profile:username:{username}', [PROFILE, IDENTITY], resolve, load)
+        if data is None:
+            return async_response(False, error=f'User not found. Payload: {payload}', status_code=404)
+        return async_response(True, data={'user': data, 'payload': payload})
+
+
+# current user profile
+class AsyncCurrentUserProfileView(View):
+    read_replica = True
+
+    async def get(self, request):
+        payload = request.jwt_payload
+        if payload is None:
+            return invalid_token_response()
+
+        async def resolve():
+            return int(payload['user_id'])
+
+        async def load(user_id):
+            user = await User.objects.filter(id=user_id).afirst()
+            return UserSerializer(user).data if user else None
+
+        data = await acached_read(f"profile:id:{payload['user_id']}", [PROFILE], resolve, load)
+        if data is None:
+            return async_response(False, error='User not found', status_code=404)
+        return async_response(True, data={'user': data, 'payload': payload})
+
+
+# tag search, most followed first (same parameters as SearchUsersByTagView)
+class AsyncSearchUsersByTagView(View):
+    read_replica = True
+
+    async def get(self, request, tag):
+        payload = request.jwt_payload
+        if payload is None:
+            return invalid_token_response()
+
+        try:
+            cursor = decode_cursor(request.GET.get('cursor'))
+            after = (int(cursor[0]), int(cursor[1])) if cursor else None
+            page_size = get_page_size(request.GET, settings.TAG_SEARCH_PAGE_SIZE, settings.TAG_SEARCH_MAX_PAGE_SIZE)
+        except (TypeError, ValueError, IndexError):
+            return JsonResponse({'message': 'Invalid cursor or page_size'}, status=400)
+
+        prefix = request.GET.get('match') == 'prefix'
+        image_variant = request.GET.get('image', 'thumbnail')
+
+        def user_row(user):
+            return {
+                'id': user.id,
+                'username': user.username,
+                'profileImage': profile_image_url(user, image_variant),
+                'followersCount': user.followersCount,
+                'followingCount': user.followingCount,
+                'bio': user.bio,
+            }
+
+        # ?stream=1: every match after the cursor, no X-Next-Cursor
+        if wants_stream(request.GET):
+            matches = search_users_by_tag(tag, prefix=prefix, after=after)
+            if after is None and not await matches.aexists():
+                return JsonResponse({'message': 'No users found with this tag'}, status=404)
+            return astream_json_array(matches, user_row)
+
+        queryset = search_users_by_tag(tag, prefix=prefix, after=after)[:page_size + 1]
+        users = [user async for user in queryset]
+
+        if not users and after is None:
+            return JsonResponse({'message': 'No users found with this tag'}, status=404)
+
+        user_data = [user_row(user) for user in users[:page_size]]
+
+        response = JsonResponse(user_data, safe=False)
+        if len(users) > page_size:
+            last = users[page_size - 1]
+            response['X-Next-Cursor'] = encode_cursor(last.followersCount, last.id)
+        return response
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+from userapp.revocation import is_revoked
+
+
+# Bounded LRU of verified access token payloads, keyed by the token digest.
+# Entries expire together with the token (its `exp` claim).
+class TokenPayloadCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, expires_at):
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenPayloadCache(settings.JWT_PAYLOAD_CACHE_SIZE)
+
+
+# Extract the raw token from an `Authorization: Bearer <token>` header
+def get_bearer_token(request):
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header[len('Bearer '):].strip() or None
+
+
+# Verify an access token (signature and claims) once, then serve it from the cache;
+# revoked tokens are rejected either way
+def verify_access_token(token):
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    payload = token_cache.get(key, now)
+    if payload is None:
+        try:
+            payload = AccessToken(token).payload
+        except (TokenError, ValueError):
+            return None
+        token_cache.set(key, payload, payload.get('exp', now))
+
+    if is_revoked(payload):
+        return None
+    return payload
+
+
+# Payload of the request's access token, or None when it is missing or invalid
+def authenticate_request(request):
+    token = get_bearer_token(request)
+    if token is None:
+        return None
+    return verify_access_token(token)
@@ -0,0 +1,177 @@
+import base64
+import math
+import time
+from collections import Counter
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from userapp.models import User, UploadJob
+from userapp.seeding import SEED_PASSWORD, SEED_TAGS
+
+# 1x1 PNG for the profile picture upload route
+TINY_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+# routes dominated by password hashing run a tenth of the requests
+HEAVY_ROUTES = {'signup/', 'login/', 'user/change-password/'}
+# routes that revoke the access token they are called with get a new one per request
+FRESH_TOKEN_ROUTES = {'logout/'}
+# routes called as another user than the main one: username of the i-th request's caller
+CALLER_ROUTES = {'delete-user/<str:userName>/': lambda ctx, i: ctx.usernames[-1 - i]}
+
+
+# Benchmark scenarios, one per route of userapp/urls.py and post/urls.py, in run order
+# (follow before unfollow, create before delete). build(ctx, i) returns the path and
+# body of the i-th request.
+SCENARIOS = [
+    ('checkup/', 'get', lambda ctx, i: ('/api/checkup/', None)),
+    ('signup/', 'post', lambda ctx, i: ('/api/signup/', {
+        'username': f'bench_signup_{i}', 'firstName': 'Bench', 'lastName': 'User',
+        'email': f'bench_signup_{i}@example.com', 'phone': f'9{i:09d}', 'password': SEED_PASSWORD,
+    })),
+    ('login/', 'post', lambda ctx, i: ('/api/login/', {'email': ctx.emails[i % len(ctx.emails)], 'password': SEED_PASSWORD})),
+    ('token/refresh/', 'post', lambda ctx, i: ('/api/token/refresh/', {'refresh': ctx.refresh})),
+    ('all-users/', 'get', lambda ctx, i: ('/api/all-users/?page_size=50', None)),
+    ('user/', 'get', lambda ctx, i: ('/api/user/', None)),
+    ('user/change-email/', 'put', lambda ctx, i: ('/api/user/change-email/', {'email': f'bench_main_{i}@example.com'})),
+    ('user/change-password/', 'put', lambda ctx, i: ('/api/user/change-password/', {'current_password': SEED_PASSWORD, 'new_password': SEED_PASSWORD})),
+    ('users/uploadProfilePicture/', 'post', lambda ctx, i: ('/api/users/uploadProfilePicture/', {'profileImage': ctx.image()})),
+    ('users/uploads/<uuid:job_id>/', 'get', lambda ctx, i: (f'/api/users/uploads/{ctx.job_id}/', None)),
+    ('users/follow/', 'post', lambda ctx, i: ('/api/users/follow/', {'userId': ctx.targets[i % len(ctx.targets)]})),
+    ('users/unfollow/', 'post', lambda ctx, i: ('/api/users/unfollow/', {'userId': ctx.targets[i % len(ctx.targets)]})),
+    ('users/follow/bulk/', 'post', lambda ctx, i: ('/api/users/follow/bulk/', {'userIds': ctx.targets})),
+    ('users/unfollow/bulk/', 'post', lambda ctx, i: ('/api/users/unfollow/bulk/', {'userIds': ctx.targets})),
+    ('users/recommendations/', 'get', lambda ctx, i: ('/api/users/recommendations/', None)),
+    ('users/<int:id>/relationship/', 'get', lambda ctx, i: (f'/api/users/{ctx.main.id}/relationship/?ids={ctx.relationship_ids}', None)),
+    ('users/<str:username>/', 'get', lambda ctx, i: (f'/api/users/{ctx.usernames[i % len(ctx.usernames)]}/', None)),
+    ('delete-user/<str:userName>/', 'delete', lambda ctx, i: (f'/api/delete-user/{ctx.usernames[-1 - i]}/', None)),
+    ('users/<str:username>/followers/', 'get', lambda ctx, i: (f'/api/users/{ctx.popular.username}/followers/', None)),
+    ('users/<str:username>/following/', 'get', lambda ctx, i: (f'/api/users/{ctx.main.username}/following/', None)),
+    ('users/<str:username>/update-biotag/', 'put', lambda ctx, i: (f'/api/users/{ctx.main.username}/update-biotag/', {'bio': f'bio {i}', 'tags': 'music,art'})),
+    ('users/searchtag/<str:tag>/', 'get', lambda ctx, i: (f'/api/users/searchtag/{SEED_TAGS[i % len(SEED_TAGS)]}/', None)),
+    ('posts/create/', 'post', lambda ctx, i: ('/api/posts/create/', {
+        'name': f'Bench post {i}', 'address': 'Bench Street', 'phone': '5550000000', 'imgUrl': 'https://example.com/bench.jpg',
+    })),
+    ('posts/<int:id>/', 'put', lambda ctx, i: (f'/api/posts/{ctx.own_post_id}/', {'name': f'Renamed {i}'})),
+    ('posts/archive/<int:id>/', 'patch', lambda ctx, i: (f'/api/posts/archive/{ctx.own_post_id}/', {'archived': i % 2 == 0})),
+    ('posts/delete/<int:id>/', 'delete', lambda ctx, i: (f'/api/posts/delete/{ctx.created_post_ids[i] if i < len(ctx.created_post_ids) else 0}/', None)),
+    ('posts/owner/<str:email>/', 'get', lambda ctx, i: (f'/api/posts/owner/{ctx.popular.email}/', None)),
+    ('posts/archived/owner/<str:email>/', 'get', lambda ctx, i: (f'/api/posts/archived/owner/{ctx.popular.email}/', None)),
+    ('feed/', 'get', lambda ctx, i: ('/api/feed/', None)),
+    ('logout/', 'post', lambda ctx, i: ('/api/logout/', {'refresh': str(RefreshToken.for_user(ctx.main))})),
+]
+
+
+# seeded users and ids the scenarios work with
+class BenchmarkContext:
+    def __init__(self, requests):
+        users = User.objects.order_by('id')
+        self.main = users.order_by('-followingCount', 'id').first()
+        self.popular = users.order_by('-followersCount', 'id').first()
+        self.emails = list(users.exclude(id=self.main.id).values_list('email', flat=True)[:requests])
+        self.user_ids = dict(users.exclude(id__in=[self.main.id, self.popular.id]).values_list('username', 'id'))
+        self.usernames = list(self.user_ids)
+        followed = self.main.following.values_list('id', flat=True)
+        self.targets = list(users.exclude(id__in=followed).exclude(id=self.main.id).values_list('id', flat=True)[:requests])
+        self.relationship_ids = ','.join(str(user_id) for user_id in users.values_list('id', flat=True)[:100])
+        self.refresh = str(RefreshToken.for_user(self.main))
+        self.job_id = UploadJob.objects.create(user=self.main).id
+        self.own_post_id = None
+        self.created_post_ids = []
+
+    def client(self, username=None):
+        user = self.main if username is None else User(id=self.user_ids[username])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def image(self):
+        return SimpleUploadedFile('bench.png', TINY_PNG, content_type='image/png')
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+# run every scenario `requests` times (HEAVY_ROUTES a tenth of that), returns {route: stats}
+def run_benchmark(requests, routes=None):
+    ctx = BenchmarkContext(requests)
+    results = {}
+    for route, method, build in SCENARIOS:
+        if routes and not any(name in route for name in routes):
+            continue
+        iterations = max(3, requests // 10) if route in HEAVY_ROUTES else requests
+        client = ctx.client()
+        statuses = Counter()
+        latencies = []
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            for i in range(iterations):
+                path, data = build(ctx, i)
+                if route in FRESH_TOKEN_ROUTES:
+                    client = ctx.client()
+                elif route in CALLER_ROUTES:
+                    client = ctx.client(CALLER_ROUTES[route](ctx, i))
+                fmt = 'multipart' if route == 'users/uploadProfilePicture/' else 'json'
+                started = time.perf_counter()
+                response = getattr(client, method)(path, data, format=fmt) if data is not None else getattr(client, method)(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+                if route == 'posts/create/' and response.status_code == 201:
+                    ctx.created_post_ids.append(response.data['id'])
+                    ctx.own_post_id = ctx.own_post_id or response.data['id']
+
+        total = sum(latencies)
+        latencies.sort()
+        results[route] = {
+            'method': method.upper(),
+            'requests': iterations,
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'error_rate': round(sum(count for code, count in statuses.items() if not 200 <= code < 300) / iterations, 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(total / iterations, 3),
+            'rps': round(iterations / (total / 1000), 1) if total else 0.0,
+            'queries_per_request': round(queries[0] / iterations, 2),
+        }
+    return results
+
+
+# routes answering more than max_error_rate of their requests with a non-2xx status:
+# their timings measure the error path, not the operation
+def failing_routes(results, max_error_rate):
+    return [f"{route}: {stats['statuses']}" for route, stats in results.items() if stats['error_rate'] > max_error_rate]
+
+
+# route patterns of userapp/urls.py and post/urls.py without a scenario
+def uncovered_routes():
+    from userapp.urls import urlpatterns as user_patterns
+    from post.urls import urlpatterns as post_patterns
+    covered = {route for route, _, _ in SCENARIOS}
+    return [str(pattern.pattern) for pattern in user_patterns + post_patterns if str(pattern.pattern) not in covered]
+
+
+# routes whose p95 latency grew by more than `tolerance` (and min_delta_ms) or that
+# issue at least half a query per request more than in the baseline (cache misses and
+# the periodic revocation sync add a few fractional queries)
+def compare(baseline, results, tolerance, min_delta_ms=1.0, min_query_delta=0.5):
+    regressions = []
+    for route, base in baseline.items():
+        current = results.get(route)
+        if current is None:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance) and current['p95_ms'] - base['p95_ms'] > min_delta_ms:
+            regressions.append(f"{route}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries_per_request'] - base['queries_per_request'] >= min_query_delta:
+            regressions.append(f"{route}: queries/request {base['queries_per_request']} -> {current['queries_per_request']}")
+    return regressions
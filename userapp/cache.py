@@ -0,0 +1,118 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from myproject.db import reading_from_replica
+
+
+# Versioned read-through cache for serialized profiles and post lists.
+#
+# An entry is stored as (entity id, versions, payload) under its lookup key (by id,
+# username or email) and is only served while the entity's versions are unchanged.
+# Invalidating bumps the versions, so it never needs to know the lookup keys.
+#
+# Version scopes, per user id:
+#   profile  - the serialized user (user saves, profile image)
+#   identity - username/email of the user (saves touching them, deletes)
+#   posts    - the user's post lists (post saves and deletes)
+PROFILE = 'profile'
+IDENTITY = 'identity'
+POSTS = 'posts'
+
+
+def read_cache():
+    return caches[settings.READ_CACHE_ALIAS]
+
+
+def _version_key(scope, entity_id):
+    return f'{scope}:{entity_id}:version'
+
+
+def _new_version():
+    # time based, so a version key evicted from the cache never restarts at an old value
+    return time.time_ns()
+
+
+def get_versions(scopes, entity_id):
+    keys = [_version_key(scope, entity_id) for scope in scopes]
+    versions = read_cache().get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        read_cache().set_many(missing, timeout=None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+async def aget_versions(scopes, entity_id):
+    keys = [_version_key(scope, entity_id) for scope in scopes]
+    versions = await read_cache().aget_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        await read_cache().aset_many(missing, timeout=None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def invalidate(scopes, entity_ids):
+    read_cache().set_many(
+        {_version_key(scope, entity_id): _new_version() for scope in scopes for entity_id in entity_ids},
+        timeout=None,
+    )
+
+
+# invalidate once the current transaction commits, so readers can't re-cache old rows
+def invalidate_on_commit(scopes, entity_ids):
+    entity_ids = list(entity_ids)
+    transaction.on_commit(lambda: invalidate(scopes, entity_ids))
+
+
+# a payload read from a replica within DB_REPLICA_LAG of the entity's last change
+# may predate that change: serve it, but don't cache it under the new versions
+def may_be_stale(versions):
+    if not reading_from_replica():
+        return False
+    return max(versions) > time.time_ns() - settings.DB_REPLICA_LAG * 1_000_000_000
+
+
+# serve lookup_key while the versions of its entity are current, otherwise
+# resolve() -> entity id or None, load(entity id) -> payload or None, and cache it.
+# The versions are read before load(): a write committing meanwhile bumps them
+# afterwards, so the entry stored here is already stale for the next reader.
+# load() must re-check the lookup (e.g. the username) since it may have changed.
+def cached_read(lookup_key, scopes, resolve, load):
+    entry = read_cache().get(lookup_key)
+    if entry is not None:
+        entity_id, versions, payload = entry
+        if versions == get_versions(scopes, entity_id):
+            return payload
+
+    entity_id = resolve()
+    if entity_id is None:
+        return None
+    versions = get_versions(scopes, entity_id)
+    payload = load(entity_id)
+    if payload is None:
+        return None
+    if not may_be_stale(versions):
+        read_cache().set(lookup_key, (entity_id, versions, payload), settings.READ_CACHE_TIMEOUT)
+    return payload
+
+
+# cached_read for the async views, resolve and load are coroutine functions
+async def acached_read(lookup_key, scopes, resolve, load):
+    entry = await read_cache().aget(lookup_key)
+    if entry is not None:
+        entity_id, versions, payload = entry
+        if versions == await aget_versions(scopes, entity_id):
+            return payload
+
+    entity_id = await resolve()
+    if entity_id is None:
+        return None
+    versions = await aget_versions(scopes, entity_id)
+    payload = await load(entity_id)
+    if payload is None:
+        return None
+    if not may_be_stale(versions):
+        await read_cache().aset(lookup_key, (entity_id, versions, payload), settings.READ_CACHE_TIMEOUT)
+    return payload
@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from userapp.models import User
+from userapp.follow_graph import FollowEdge
+
+
+# apply counter deltas to users in a single UPDATE statement,
+# e.g. adjust_counters([user_id], followersCount=1); counters never go below zero
+def adjust_counters(user_ids, **deltas):
+    updates = {}
+    for field, delta in deltas.items():
+        if delta > 0:
+            updates[field] = F(field) + delta
+        elif delta < 0:
+            updates[field] = Greatest(F(field) + delta, 0)
+    if updates:
+        User.objects.filter(id__in=user_ids).update(**updates)
+
+
+def _count_subquery(queryset, column):
+    counts = queryset.filter(**{column: OuterRef('pk')}).order_by().values(column).annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+# the true counter values, computed from the follow edges and the posts table
+def actual_counters():
+    Post = apps.get_model('post', 'Post')
+    return {
+        'followersCount': _count_subquery(FollowEdge.objects.all(), 'from_user_id'),
+        'followingCount': _count_subquery(FollowEdge.objects.all(), 'to_user_id'),
+        'postsCount': _count_subquery(Post.objects.all(), 'owner_id'),
+    }
+
+
+# recompute the counters of users with id in [first_id, last_id] and fix the drifted rows,
+# returns the number of repaired users
+def repair_counters(first_id, last_id):
+    counters = actual_counters()
+    annotated = User.objects.filter(id__gte=first_id, id__lte=last_id).annotate(
+        **{f'actual_{field}': expression for field, expression in counters.items()}
+    )
+    drifted = Q()
+    for field in counters:
+        drifted |= ~Q(**{field: F(f'actual_{field}')})
+
+    drifted_ids = list(annotated.filter(drifted).values_list('id', flat=True))
+    if drifted_ids:
+        User.objects.filter(id__in=drifted_ids).update(**counters)
+    return len(drifted_ids)
@@ -0,0 +1,43 @@
+from django.db.models import Q
+from userapp.models import User
+
+
+# through table of User.followers, one row per follow edge
+FollowEdge = User.followers.through
+
+# user.followers is stored as from_user -> to_user on the through table,
+# user.following is the reverse side of the same rows (to_user -> from_user)
+# relation -> (column of the listed user, the other user)
+RELATIONS = {
+    'followers': ('from_user_id', 'to_user'),
+    'following': ('to_user_id', 'from_user'),
+}
+
+
+# follow relationship of user_id with every target, in one indexed query:
+# {target id: {'following': user follows target, 'followedBy': target follows user}}
+def load_relationships(user_id, target_ids):
+    relationships = {target_id: {'following': False, 'followedBy': False} for target_id in target_ids}
+    edges = FollowEdge.objects.filter(
+        Q(to_user_id=user_id, from_user_id__in=target_ids) | Q(from_user_id=user_id, to_user_id__in=target_ids)
+    ).values_list('from_user_id', 'to_user_id')
+    for from_user_id, to_user_id in edges:
+        if to_user_id == user_id and from_user_id in relationships:
+            relationships[from_user_id]['following'] = True
+        if from_user_id == user_id and to_user_id in relationships:
+            relationships[to_user_id]['followedBy'] = True
+    return relationships
+
+
+# one keyset page of a user's followers or following, ordered by follow edge id:
+# edges with id > after_id, each with the other user (compact columns) joined in
+def follow_list_page(user_id, relation, after_id, page_size):
+    owner_column, other = RELATIONS[relation]
+    edges = FollowEdge.objects.filter(**{owner_column: user_id})
+    if after_id is not None:
+        edges = edges.filter(id__gt=after_id)
+    return (
+        edges.select_related(other)
+        .only('id', f'{other}__id', f'{other}__username', f'{other}__profileImage', f'{other}__profileImageVariants')
+        .order_by('id')[:page_size]
+    )
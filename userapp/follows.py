@@ -0,0 +1,92 @@
+from django.db import transaction
+from userapp.models import User
+from userapp.follow_graph import FollowEdge
+from userapp.counters import adjust_counters
+from userapp.recommendations import mark_stale
+
+# per-id results of the bulk follow/unfollow writes
+FOLLOWED = 'followed'
+UNFOLLOWED = 'unfollowed'
+ALREADY_FOLLOWING = 'already_following'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+# Set-based follow graph writes: a whole list of target users is resolved, written
+# and counted with a fixed number of queries.
+
+
+# Serializes the follow graph writes of one follower (single and bulk, follow and
+# unfollow) for the rest of the transaction, so the edges read before a write are
+# still the edges when it runs. A no-op on SQLite, where writes are serialized anyway.
+def lock_follower(follower_id):
+    list(User.objects.select_for_update().filter(id=follower_id).values_list('id', flat=True))
+
+
+# the existing users among target_ids, the follower excluded (nobody follows themselves)
+def _found_targets(follower_id, target_ids):
+    return set(User.objects.filter(id__in=target_ids).exclude(id=follower_id).values_list('id', flat=True))
+
+
+def _existing_targets(follower_id, target_ids):
+    return set(
+        FollowEdge.objects.filter(to_user_id=follower_id, from_user_id__in=target_ids)
+        .values_list('from_user_id', flat=True)
+    )
+
+
+# follow every user in target_ids, returns ({target id: result}, ids of the newly followed users)
+def follow_many(follower_id, target_ids):
+    found = _found_targets(follower_id, target_ids)
+    with transaction.atomic():
+        lock_follower(follower_id)
+        already = _existing_targets(follower_id, found)
+        # ignore_conflicts: an edge written meanwhile (e.g. by the importer) is not an error
+        FollowEdge.objects.bulk_create(
+            [FollowEdge(from_user_id=target_id, to_user_id=follower_id) for target_id in found - already],
+            ignore_conflicts=True,
+        )
+        # count the rows this insert added, not the ones it was asked to add
+        new_ids = sorted(_existing_targets(follower_id, found) - already)
+        if new_ids:
+            adjust_counters([follower_id], followingCount=len(new_ids))
+            adjust_counters(new_ids, followersCount=1)
+            mark_stale([follower_id])
+
+    results = {}
+    for target_id in target_ids:
+        if target_id == follower_id:
+            results[target_id] = SELF
+        elif target_id not in found:
+            results[target_id] = NOT_FOUND
+        elif target_id in new_ids:
+            results[target_id] = FOLLOWED
+        else:
+            results[target_id] = ALREADY_FOLLOWING
+    return results, new_ids
+
+
+# unfollow every user in target_ids, returns ({target id: result}, ids of the unfollowed users)
+def unfollow_many(follower_id, target_ids):
+    found = _found_targets(follower_id, target_ids)
+    with transaction.atomic():
+        lock_follower(follower_id)
+        removed_ids = sorted(_existing_targets(follower_id, found))
+        if removed_ids:
+            FollowEdge.objects.filter(to_user_id=follower_id, from_user_id__in=removed_ids).delete()
+            adjust_counters([follower_id], followingCount=-len(removed_ids))
+            adjust_counters(removed_ids, followersCount=-1)
+            mark_stale([follower_id])
+
+    results = {}
+    for target_id in target_ids:
+        if target_id == follower_id:
+            results[target_id] = SELF
+        elif target_id not in found:
+            results[target_id] = NOT_FOUND
+        elif target_id in removed_ids:
+            results[target_id] = UNFOLLOWED
+        else:
+            results[target_id] = NOT_FOLLOWING
+    return results, removed_ids
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher, check_password, make_password,
+)
+from userapp.pools import BoundedPool
+
+
+# Password hashers with their cost parameters taken from settings (None keeps the
+# Django default). A stored hash whose parameters differ from these is reported by
+# must_update and rehashed on login.
+def _cost(setting, default):
+    return default if setting is None else setting
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = _cost(settings.PASSWORD_PBKDF2_ITERATIONS, PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = _cost(settings.PASSWORD_SCRYPT_WORK_FACTOR, ScryptPasswordHasher.work_factor)
+    block_size = _cost(settings.PASSWORD_SCRYPT_BLOCK_SIZE, ScryptPasswordHasher.block_size)
+    parallelism = _cost(settings.PASSWORD_SCRYPT_PARALLELISM, ScryptPasswordHasher.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = _cost(settings.PASSWORD_ARGON2_TIME_COST, Argon2PasswordHasher.time_cost)
+    memory_cost = _cost(settings.PASSWORD_ARGON2_MEMORY_COST, Argon2PasswordHasher.memory_cost)
+    parallelism = _cost(settings.PASSWORD_ARGON2_PARALLELISM, Argon2PasswordHasher.parallelism)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# Bounded hashing pool: PASSWORD_HASH_WORKERS threads (the hashers release the GIL)
+# and at most PASSWORD_HASH_QUEUE_SIZE waiting hashes, so a login storm can't take
+# every core and request thread
+hash_pool = BoundedPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE, HashingBusy, 'hasher')
+
+
+# run fn(*args) on the hashing pool, raises HashingBusy when the backlog is full
+def run_hasher(fn, *args):
+    return hash_pool.run(fn, *args)
+
+
+# make_password on the hashing pool
+def hash_password(password):
+    return run_hasher(make_password, password)
+
+
+# check_password on the hashing pool; setter(password) is called when the stored hash
+# was made with another hasher or other parameters
+def verify_password(password, encoded, setter=None):
+    return run_hasher(check_password, password, encoded, setter)
@@ -0,0 +1,49 @@
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+# Micro-benchmark of the configured password hashers: password checks per second
+# on one core (= logins/sec per core spent in the hasher). The cost parameters come
+# from the PASSWORD_* settings, so compare settings by running it with other env values.
+class Command(BaseCommand):
+    help = 'Measure password checks per second per core for each hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', default=','.join(settings.PASSWORD_HASHER_CLASSES))
+        parser.add_argument('--seconds', type=float, default=2.0)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        results = []
+        for name in options['hashers'].split(','):
+            hasher = import_string(settings.PASSWORD_HASHER_CLASSES[name.strip()])()
+            try:
+                encoded = hasher.encode('benchmark-password', hasher.salt())
+            except ValueError as e:  # hasher library not installed
+                self.stderr.write(f'{name}: skipped ({e})')
+                continue
+
+            checks = 0
+            started = time.perf_counter()
+            while time.perf_counter() - started < options['seconds']:
+                hasher.verify('benchmark-password', encoded)
+                checks += 1
+            elapsed = time.perf_counter() - started
+
+            params = {key: value for key, value in hasher.decode(encoded).items() if key not in ('hash', 'salt')}
+            results.append({
+                'hasher': name,
+                'params': params,
+                'logins_per_sec_per_core': round(checks / elapsed, 2),
+                'ms_per_check': round(elapsed / checks * 1000, 2),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            params = ' '.join(f'{key}={value}' for key, value in result['params'].items())
+            self.stdout.write(f"{result['hasher']:<8} {result['logins_per_sec_per_core']:>10}/s {result['ms_per_check']:>8} ms  {params}")
@@ -0,0 +1,28 @@
+import json
+import sys
+from django.core.management.base import BaseCommand
+from userapp.transfer import export_records, TYPES
+
+
+# Stream users, posts and follow edges as NDJSON (see userapp.transfer)
+class Command(BaseCommand):
+    help = 'Export users, posts and follow edges as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help='File to write, - for stdout')
+        parser.add_argument('--types', default=','.join(TYPES), help='Comma separated record types to export')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        types = [kind.strip() for kind in options['types'].split(',') if kind.strip()]
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        written = 0
+        try:
+            for record in export_records(types, chunk_size=options['chunk_size']):
+                output.write(json.dumps(record) + '\n')
+                written += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(f'Exported {written} records')
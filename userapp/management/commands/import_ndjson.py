@@ -0,0 +1,29 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from userapp.transfer import import_lines, ImportFailed
+
+
+# Bulk import an NDJSON export (see userapp.transfer) in one transaction. Passwords
+# may be encoded hashes or plain text (hashed on import). Counters are recomputed
+# and home timelines backfilled at the end; recommendation lists of new users are
+# built by the next refresh_recommendations run.
+class Command(BaseCommand):
+    help = 'Import users, posts and follow edges from NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='NDJSON file to read, - for stdin')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        source = sys.stdin if options['input'] == '-' else open(options['input'], encoding='utf-8')
+        try:
+            counts = import_lines(source, batch_size=options['batch_size'])
+        except ImportFailed as e:
+            raise CommandError(f'Import failed, nothing was imported: {e}')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['user']} users, {counts['post']} posts and {counts['follow']} follow edges"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from userapp.models import RevokedToken
+
+
+# Delete revocations of tokens that have expired anyway
+class Command(BaseCommand):
+    help = 'Delete revoked tokens past their expiry'
+
+    def handle(self, *args, **options):
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} revoked tokens'))
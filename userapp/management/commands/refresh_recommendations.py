@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from userapp.models import User
+from userapp.recommendations import compute_recommendations, store_recommendations, users_to_refresh
+
+
+# Rebuild the "people you may know" lists that are missing, stale or due for a
+# refresh (--all rebuilds every list); meant to run periodically, e.g. from cron
+class Command(BaseCommand):
+    help = 'Recompute the recommendation lists of users in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help='Recompute every user, not only the due ones')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['all']:
+            user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        else:
+            user_ids = list(users_to_refresh())
+
+        for start in range(0, len(user_ids), batch_size):
+            store_recommendations(compute_recommendations(user_ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed recommendations of {len(user_ids)} users'))
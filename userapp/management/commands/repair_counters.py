@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from userapp.models import User
+from userapp.counters import repair_counters
+
+
+# Recompute followersCount/followingCount/postsCount from the follow edges and
+# the posts table, fixing drifted rows in batches of users
+class Command(BaseCommand):
+    help = 'Recompute and repair the follower, following and post counters of all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write('No users')
+            return
+
+        repaired = 0
+        for first_id in range(bounds['first'], bounds['last'] + 1, batch_size):
+            with transaction.atomic():
+                repaired += repair_counters(first_id, first_id + batch_size - 1)
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters of {repaired} users'))
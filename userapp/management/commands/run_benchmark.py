@@ -0,0 +1,94 @@
+import json
+import logging
+import sys
+import tempfile
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from userapp.authentication import token_cache
+from userapp.revocation import revocation_list
+from userapp.seeding import seed
+from myproject.logs import QueueingHandler
+from userapp.benchmark import run_benchmark, uncovered_routes, compare, failing_routes
+
+
+# Seed a fresh test database, drive every API route through the test client and report
+# p50/p95/p99 latency, throughput and queries per request. --output saves the results
+# as a JSON baseline, --compare fails when a route regressed against one. A route with
+# more than --max-error-rate non-2xx responses fails the run (and is never saved).
+class Command(BaseCommand):
+    help = 'Benchmark every API route against a freshly seeded database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=50, help='Requests per route')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--routes', default='', help='Comma separated substrings of the routes to run')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth over the baseline')
+        parser.add_argument('--max-error-rate', type=float, default=0.05, help='Allowed share of non-2xx responses per route')
+
+    def handle(self, *args, **options):
+        for route in uncovered_routes():
+            self.stderr.write(f'No benchmark scenario for route {route}')
+
+        # expected 4xx responses would log a warning per request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        # request logs (slow requests) go to stderr, the report to stdout
+        for name in ('userapp', 'post'):
+            for handler in logging.getLogger(name).handlers:
+                if isinstance(handler, QueueingHandler):
+                    handler.target.setStream(sys.stderr)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        media_dir = tempfile.mkdtemp(prefix='bench-media-')
+        try:
+            with override_settings(
+                RATE_LIMIT_ENABLED=False,
+                IMAGE_STORAGE_BACKEND='userapp.uploads.LocalImageStorage',
+                MEDIA_ROOT=media_dir,
+                UPLOAD_SPOOL_DIR=media_dir,
+            ):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                token_cache.clear()
+                revocation_list.clear()
+
+                seed(options['users'], options['posts'], seed=options['seed'])
+                routes = [route.strip() for route in options['routes'].split(',') if route.strip()]
+                results = run_benchmark(options['requests'], routes)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'route':<40} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8}  statuses")
+        for route, stats in results.items():
+            self.stdout.write(
+                f"{stats['method']:<6} {route:<33} {stats['requests']:>4} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                f"{stats['p99_ms']:>9} {stats['rps']:>8} {stats['queries_per_request']:>8}  {stats['statuses']}"
+            )
+
+        failing = failing_routes(results, options['max_error_rate'])
+        if failing:
+            raise CommandError('Routes answering with errors, their timings are not comparable:\n' + '\n'.join(failing))
+
+        report = {
+            'meta': {key: options[key] for key in ('users', 'posts', 'requests', 'seed')},
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            regressions = compare(baseline['routes'], results, options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
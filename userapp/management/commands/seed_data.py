@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from userapp.models import User
+from userapp.seeding import seed, SEED_PASSWORD
+
+
+# Fill an empty database with generated users, a power-law follow graph and posts
+class Command(BaseCommand):
+    help = 'Seed the database with N users, M posts and a power-law follow graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--avg-following', type=int, default=20)
+        parser.add_argument('--force', action='store_true', help='Seed even when the database already has users')
+
+    def handle(self, *args, **options):
+        if User.objects.exists() and not options['force']:
+            raise CommandError('The database already has users; seed a fresh database or pass --force')
+
+        user_ids = seed(options['users'], options['posts'], seed=options['seed'], avg_following=options['avg_following'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(user_ids)} users and {options['posts']} posts (password: {SEED_PASSWORD})"
+        ))
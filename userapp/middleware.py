@@ -0,0 +1,216 @@
+import logging
+from contextlib import ExitStack
+import random
+import re
+import time
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from userapp.authentication import authenticate_request
+from userapp.revocation import revocation_list
+from myproject.logs import request_id_var
+from myproject.db import current_request
+from myproject import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Verifies the bearer token once per request and exposes its payload to the
+# views as `request.jwt_payload` (None when the token is missing or invalid).
+# Runs natively under both WSGI and ASGI.
+class JWTPayloadMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        revocation_list.sync_if_due()
+        started = time.perf_counter()
+        request.jwt_payload = authenticate_request(request)
+        request.auth_seconds = time.perf_counter() - started
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # the periodic revocation sync queries the database, the rest is in-process
+        if revocation_list.sync_due(time.time()):
+            await sync_to_async(revocation_list.sync_if_due)()
+        # verification is cached, in-process CPU work: no thread hop needed
+        started = time.perf_counter()
+        request.jwt_payload = authenticate_request(request)
+        request.auth_seconds = time.perf_counter() - started
+        return await self.get_response(request)
+
+
+# Correlation id of the request: the client's X-Request-ID when it looks sane, else a
+# new one. Set for the logs (myproject.logs) and echoed in the response header.
+class RequestIdMiddleware:
+    sync_capable = True
+    async_capable = True
+    valid_id = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def request_id(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        return request_id if self.valid_id.match(request_id) else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.request_id = self.request_id(request)
+        token = request_id_var.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = self.request_id(request)
+        token = request_id_var.set(request.request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+
+# Makes the request visible to myproject.db.ReadReplicaRouter, which sends the
+# reads of views marked `read_replica = True` to a replica. The view is only known
+# once the url is resolved, so the router looks it up when the first query runs.
+class ReadReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+
+# execute_wrapper counting the SQL queries of a request and their time,
+# optionally keeping the first `capture` statements (without parameters)
+class QueryProbe:
+    def __init__(self, capture=0):
+        self.capture = capture
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.statements) < self.capture:
+                self.statements.append({'sql': sql, 'ms': round(elapsed * 1000, 3)})
+
+
+# Per-view request metrics (myproject.metrics): every request is counted and timed;
+# a METRICS_SAMPLE_RATE fraction also records its SQL queries, database time and
+# rendering time. Requests slower than METRICS_SLOW_REQUEST_MS are logged, with
+# their SQL when sampled. Under ASGI the ORM runs in worker threads, so async
+# requests only get the request and auth timings.
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        probe = None
+        if random.random() < settings.METRICS_SAMPLE_RATE:
+            request.metrics_sampled = True
+            probe = QueryProbe(capture=settings.METRICS_SLOW_SQL_LIMIT if settings.METRICS_SLOW_REQUEST_MS else 0)
+            # every alias: the read views query the replicas (myproject.db)
+            with ExitStack() as stack:
+                for db in connections.all():
+                    stack.enter_context(db.execute_wrapper(probe))
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, probe)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, None)
+        return response
+
+    # DRF responses are rendered after the view: time it on sampled requests
+    def process_template_response(self, request, response):
+        if getattr(request, 'metrics_sampled', False):
+            started = time.perf_counter()
+
+            def rendered(response):
+                request.render_seconds = time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, seconds, probe):
+        match = getattr(request, 'resolver_match', None)
+        view = (('view', match.route if match else 'unmatched'),)
+        metrics.requests_total.inc(view + (('method', request.method), ('status', str(response.status_code))))
+        metrics.request_duration.observe(view, seconds)
+        if hasattr(request, 'auth_seconds'):
+            metrics.auth_duration.observe(view, request.auth_seconds)
+        if probe is not None:
+            metrics.db_queries.observe(view, probe.count)
+            metrics.db_duration.observe(view, probe.seconds)
+        if hasattr(request, 'render_seconds'):
+            metrics.render_duration.observe(view, request.render_seconds)
+
+        if settings.METRICS_SLOW_REQUEST_MS and seconds * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            logger.warning('slow request', extra={
+                'view': view[0][1],
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': round(seconds * 1000, 3),
+                'queries': probe.count if probe else None,
+                'db_ms': round(probe.seconds * 1000, 3) if probe else None,
+                'sql': probe.statements if probe else None,
+            })
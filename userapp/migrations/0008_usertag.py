@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# index the comma-separated tags of the existing users
+def backfill_user_tags(apps, schema_editor):
+    User = apps.get_model('userapp', 'User')
+    UserTag = apps.get_model('userapp', 'UserTag')
+
+    batch = []
+    for user_id, tags in User.objects.exclude(tags__isnull=True).exclude(tags='').values_list('id', 'tags').iterator():
+        normalized = {tag.strip().lower() for tag in tags.split(',')} - {''}
+        batch.extend(UserTag(user_id=user_id, tag=tag) for tag in normalized)
+        if len(batch) >= 1000:
+            UserTag.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserTag.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0007_alter_user_profileimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=255)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='userapp.user')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tag', 'user'), name='usertag_tag_user_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_user_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0009_uploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profileImageVariants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 15:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0011_user_timestamps'),
+    ]
+
+    # the auto-created through table of User.followers has no Meta, so the
+    # (to_user_id, from_user_id) covering index is managed here
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX "userapp_user_followers_to_from_idx" ON "userapp_user_followers" ("to_user_id", "from_user_id");',
+            reverse_sql='DROP INDEX "userapp_user_followers_to_from_idx";',
+        ),
+    ]
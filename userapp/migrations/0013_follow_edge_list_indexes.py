@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-18 15:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0012_follow_edge_reverse_index'),
+    ]
+
+    # keyset pages of a user's followers/following, in follow edge id order
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX "userapp_user_followers_from_id_idx" ON "userapp_user_followers" ("from_user_id", "id");',
+            reverse_sql='DROP INDEX "userapp_user_followers_from_id_idx";',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "userapp_user_followers_to_id_idx" ON "userapp_user_followers" ("to_user_id", "id");',
+            reverse_sql='DROP INDEX "userapp_user_followers_to_id_idx";',
+        ),
+    ]
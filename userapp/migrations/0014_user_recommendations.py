@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0013_follow_edge_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendations',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to='userapp.user')),
+                ('candidates', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('stale', models.BooleanField(db_index=True, default=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1 on 2026-10-18 16:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userapp', '0015_revokedtoken'),
+    ]
+
+    # the single-column foreign key indexes Django creates on the through table are
+    # prefixes of (from_user_id, to_user_id) unique, (from_user_id, id), (to_user_id,
+    # from_user_id) and (to_user_id, id): every lookup they serve is served by those,
+    # so they only cost writes
+    operations = [
+        migrations.RunSQL(
+            'DROP INDEX "userapp_user_followers_from_user_id_3b076f81";',
+            reverse_sql='CREATE INDEX "userapp_user_followers_from_user_id_3b076f81" ON "userapp_user_followers" ("from_user_id");',
+        ),
+        migrations.RunSQL(
+            'DROP INDEX "userapp_user_followers_to_user_id_c6756090";',
+            reverse_sql='CREATE INDEX "userapp_user_followers_to_user_id_c6756090" ON "userapp_user_followers" ("to_user_id");',
+        ),
+    ]
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from cloudinary.models import CloudinaryField # type: ignore
 
@@ -16,8 +17,69 @@ class User(models.Model):
     followingCount = models.IntegerField(default=0)
     profileImage = CloudinaryField(default='https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/1.png')
     # profileImage = CloudinaryField('profileImage', blank = True, null = True)
+    profileImageVariants = models.JSONField(default=dict, blank=True)  # {'thumbnail': url, 'medium': url, 'full': url}
     tags = models.CharField(max_length=255, blank=True)  
     bio = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.username
+
+
+# Normalized tag index (one row per user and lowercased tag) backing tag search,
+# kept in sync with User.tags by userapp.tags.sync_user_tags
+class UserTag(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tag_index')
+    tag = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'user'], name='usertag_tag_user_uniq'),
+        ]
+
+    def __str__(self):
+        return self.tag
+
+
+# Background profile image upload, reported by the upload status endpoint
+class UploadJob(models.Model):
+    QUEUED = 'queued'
+    UPLOADING = 'uploading'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (UPLOADING, 'Uploading'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_jobs')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    url = models.URLField(max_length=500, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.user_id}:{self.status}'
+
+
+# Precomputed "people you may know" list of a user, rebuilt by the
+# refresh_recommendations command (see userapp.recommendations)
+class UserRecommendations(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='recommendations')
+    candidates = models.JSONField(default=list)  # [{'userId', 'score', 'mutuals', 'sharedTags'}], best first
+    computed_at = models.DateTimeField(db_index=True)
+    stale = models.BooleanField(default=False, db_index=True)  # the user's follows or tags changed since
+
+    def __str__(self):
+        return f'{self.user_id}:{len(self.candidates)}'
+
+
+# Revoked (logged out or rotated) JWTs by jti, kept until the token expires;
+# mirrored in memory by userapp.revocation
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
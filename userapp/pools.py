@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Thread pool with a bounded backlog: `workers` threads and at most `queue_size`
+# waiting tasks. Past that, submit() raises `busy` (an exception class) instead of
+# queueing, so a burst can't pile up unbounded work. The threads start on first use.
+class BoundedPool:
+    def __init__(self, workers, queue_size, busy, thread_name_prefix):
+        self.workers = workers
+        self.busy = busy
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.thread_name_prefix)
+            return self._executor
+
+    # run fn(*args) in the pool, returns its Future; the slot is freed when it finishes
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise self.busy()
+        try:
+            future = self.get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        return future
+
+    # submit and wait for the result
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
@@ -0,0 +1,98 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import status
+from userapp.utils import custom_response
+
+
+# Token buckets: a bucket holds up to `capacity` tokens and refills at capacity/period
+# tokens per second; a request takes one token. take() returns 0 when the request is
+# allowed, otherwise the seconds until a token is available.
+def _refill(tokens, updated, capacity, period, now):
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def _take(tokens, capacity, period):
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) * period / capacity
+
+
+# In-process store (default), bounded LRU of buckets
+class MemoryBucketStore:
+    def __init__(self):
+        self.max_size = settings.RATE_LIMIT_MAX_KEYS
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, retry_after = _take(_refill(tokens, updated, capacity, period, now), capacity, period)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Buckets in the RATE_LIMIT_CACHE_ALIAS cache, shared by every process using it (a local
+# file cache by default). Read-modify-write, so concurrent processes may let a few extra
+# requests through; enough to stop bursts.
+class CacheBucketStore:
+    def __init__(self):
+        self.cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+
+    def take(self, key, capacity, period, now):
+        tokens, updated = self.cache.get(f'ratelimit:{key}', (capacity, now))
+        tokens, retry_after = _take(_refill(tokens, updated, capacity, period, now), capacity, period)
+        self.cache.set(f'ratelimit:{key}', (tokens, now), timeout=math.ceil(period))
+        return retry_after
+
+    def clear(self):
+        self.cache.clear()
+
+
+bucket_store = import_string(settings.RATE_LIMIT_STORE)()
+
+
+# Behind RATE_LIMIT_PROXY_HOPS trusted proxies, each appending the address it was
+# connected from to X-Forwarded-For, the client is the Nth entry from the right.
+# Entries left of it are written by the client and can't be trusted.
+def client_ip(request):
+    hops = settings.RATE_LIMIT_PROXY_HOPS
+    forwarded = [entry.strip() for entry in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if entry.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# take a token from every bucket of the scope (settings.RATE_LIMITS), returns a 429
+# response with Retry-After when one of them is empty, otherwise None
+def rate_limit_response(request, scope, email=None):
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+
+    identities = {'ip': client_ip(request)}
+    if isinstance(email, str) and email:
+        identities['email'] = email.strip().lower()
+
+    now = time.time()
+    retry_after = 0
+    for kind, (capacity, period) in settings.RATE_LIMITS[scope].items():
+        if kind in identities:
+            retry_after = max(retry_after, bucket_store.take(f'{scope}:{kind}:{identities[kind]}', capacity, period, now))
+
+    if not retry_after:
+        return None
+    response = custom_response(False, error='Too many attempts, try again later', status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
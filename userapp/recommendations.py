@@ -0,0 +1,102 @@
+import heapq
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from userapp.models import User, UserTag, UserRecommendations
+from userapp.follow_graph import FollowEdge
+
+
+# "People you may know": candidates are scored by mutual follows (users followed by
+# the people the user follows) and shared tags. Lists are computed in batches by the
+# refresh_recommendations command and stored per user; requests only read them.
+
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+# {user id: set of followed user ids} for the given users
+def _following_sets(user_ids):
+    following = defaultdict(set)
+    for chunk in _chunks(user_ids):
+        for follower_id, followee_id in FollowEdge.objects.filter(to_user_id__in=chunk).values_list('to_user_id', 'from_user_id').iterator(chunk_size=5000):
+            following[follower_id].add(followee_id)
+    return following
+
+
+# {tag: set of user ids}, at most RECOMMENDATION_TAG_CANDIDATES users per tag
+def _tag_members(tags):
+    return {
+        tag: set(UserTag.objects.filter(tag=tag).values_list('user_id', flat=True)[:settings.RECOMMENDATION_TAG_CANDIDATES])
+        for tag in tags
+    }
+
+
+# recommendation lists for a batch of users: {user id: [candidate, ...]}
+def compute_recommendations(user_ids):
+    following = _following_sets(user_ids)
+    second_hop = _following_sets(set().union(*following.values()))
+
+    user_tags = defaultdict(set)
+    for user_id, tag in UserTag.objects.filter(user_id__in=user_ids).values_list('user_id', 'tag'):
+        user_tags[user_id].add(tag)
+    tag_members = _tag_members(set().union(*user_tags.values()))
+
+    lists = {}
+    for user_id in user_ids:
+        mutuals = Counter()
+        for followee_id in following[user_id]:
+            mutuals.update(second_hop[followee_id])
+        shared_tags = Counter()
+        for tag in user_tags[user_id]:
+            shared_tags.update(tag_members[tag])
+
+        excluded = following[user_id] | {user_id}
+        scores = {
+            candidate_id: mutuals[candidate_id] * settings.RECOMMENDATION_MUTUAL_WEIGHT + shared_tags[candidate_id] * settings.RECOMMENDATION_TAG_WEIGHT
+            for candidate_id in (mutuals.keys() | shared_tags.keys()) - excluded
+        }
+        best = heapq.nlargest(settings.RECOMMENDATION_LIMIT, scores, key=lambda candidate_id: (scores[candidate_id], -candidate_id))
+        lists[user_id] = [{
+            'userId': candidate_id,
+            'score': scores[candidate_id],
+            'mutuals': mutuals[candidate_id],
+            'sharedTags': shared_tags[candidate_id],
+        } for candidate_id in best]
+    return lists
+
+
+def store_recommendations(lists):
+    now = timezone.now()
+    UserRecommendations.objects.bulk_create(
+        [UserRecommendations(user_id=user_id, candidates=candidates, computed_at=now) for user_id, candidates in lists.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['candidates', 'computed_at', 'stale'],
+    )
+
+
+# users whose list is missing, stale or older than RECOMMENDATION_REFRESH_AFTER
+def users_to_refresh():
+    refresh_before = timezone.now() - settings.RECOMMENDATION_REFRESH_AFTER
+    return User.objects.filter(
+        Q(recommendations__isnull=True)
+        | Q(recommendations__stale=True)
+        | Q(recommendations__computed_at__lt=refresh_before)
+    ).order_by('id').values_list('id', flat=True)
+
+
+# the user's follows or tags changed, recompute on the next refresh
+def mark_stale(user_ids):
+    UserRecommendations.objects.filter(user_id__in=user_ids).update(stale=True)
+
+
+# stored candidates of the user, [] when missing or older than RECOMMENDATION_TTL
+def get_recommendations(user_id):
+    stored = UserRecommendations.objects.filter(
+        user_id=user_id, computed_at__gte=timezone.now() - settings.RECOMMENDATION_TTL,
+    ).values_list('candidates', flat=True).first()
+    return stored or []
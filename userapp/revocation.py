@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from userapp.models import RevokedToken
+
+
+# In-memory revocation list of JWT ids. A bloom filter answers the common case (token
+# not revoked) with a few bit tests; its positives are confirmed by the exact set of
+# jti -> expiry. Entries are dropped once their token has expired. Each process pulls
+# the revocations of the others from RevokedToken every REVOCATION_SYNC_INTERVAL seconds.
+class RevocationList:
+    def __init__(self, bits, hashes):
+        self.bits = bits
+        self.hashes = hashes
+        self._bloom = bytearray(bits // 8)
+        self._exact = {}
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._next_sync = 0
+
+    def _positions(self, jti):
+        digest = hashlib.sha256(jti.encode()).digest()
+        return [int.from_bytes(digest[i * 4:i * 4 + 4], 'big') % self.bits for i in range(self.hashes)]
+
+    def _add(self, jti, expires_at):
+        self._exact[jti] = expires_at
+        for position in self._positions(jti):
+            self._bloom[position >> 3] |= 1 << (position & 7)
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def is_revoked(self, jti, now):
+        for position in self._positions(jti):
+            if not self._bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        expires_at = self._exact.get(jti)
+        return expires_at is not None and expires_at > now
+
+    # drop expired entries and rebuild the bloom filter from what is left
+    def prune(self, now):
+        with self._lock:
+            live = {jti: expires_at for jti, expires_at in self._exact.items() if expires_at > now}
+            self._bloom = bytearray(self.bits // 8)
+            self._exact = {}
+            for jti, expires_at in live.items():
+                self._add(jti, expires_at)
+
+    def sync_due(self, now):
+        return now >= self._next_sync
+
+    # load the revocations recorded since the last sync (all live ones the first time)
+    def sync(self, now):
+        rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        if self._synced_at is not None:
+            # overlap so rows committed late by other processes are not missed
+            rows = rows.filter(created_at__gte=self._synced_at - timedelta(seconds=settings.REVOCATION_SYNC_INTERVAL))
+        synced_at = timezone.now()
+        revoked = list(rows.values_list('jti', 'expires_at'))
+
+        with self._lock:
+            for jti, expires_at in revoked:
+                self._add(jti, expires_at.timestamp())
+        self._synced_at = synced_at
+        self._next_sync = now + settings.REVOCATION_SYNC_INTERVAL
+        self.prune(now)
+
+    def sync_if_due(self):
+        now = time.time()
+        if self.sync_due(now):
+            self.sync(now)
+
+    def clear(self):
+        with self._lock:
+            self._bloom = bytearray(self.bits // 8)
+            self._exact = {}
+        self._synced_at = None
+        self._next_sync = 0
+
+
+revocation_list = RevocationList(settings.REVOCATION_BLOOM_BITS, settings.REVOCATION_BLOOM_HASHES)
+
+
+# revoke a token (payload with jti and exp claims) in this process and for the others
+def revoke_token(payload):
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.bulk_create([RevokedToken(jti=payload['jti'], expires_at=expires_at)], ignore_conflicts=True)
+    revocation_list.add(payload['jti'], payload['exp'])
+
+
+def is_revoked(payload):
+    return revocation_list.is_revoked(payload.get('jti', ''), time.time())
@@ -0,0 +1,91 @@
+import itertools
+import random
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from userapp.models import User, UserTag
+from userapp.follow_graph import FollowEdge
+from userapp.counters import repair_counters
+from userapp.recommendations import compute_recommendations, store_recommendations
+from post.feed import backfill_authors
+
+SEED_PASSWORD = 'seed-password'
+SEED_TAGS = ['music', 'art', 'travel', 'food', 'tech', 'sports', 'books', 'film', 'photo', 'games', 'fitness', 'design']
+
+
+# cumulative Zipf weights (rank r gets 1 / (r + 1) ** exponent) for random.choices
+def _zipf_cum_weights(n, exponent):
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+# Generate `users` users with a power-law follow graph (a few accounts are followed by
+# most users) and `posts` posts owned with the same skew, plus tags, counters, home
+# timelines and recommendation lists. Deterministic for a given `seed`; meant for an
+# empty database. Every user's password is SEED_PASSWORD.
+def seed(users, posts, seed=0, avg_following=20, exponent=1.1, batch_size=1000):
+    rng = random.Random(seed)
+    Post = apps.get_model('post', 'Post')
+    first_id = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    password = make_password(SEED_PASSWORD)  # hashed once, shared by every seeded user
+
+    with transaction.atomic():
+        User.objects.bulk_create([User(
+            id=first_id + i,
+            firstName=f'Seed{i}',
+            lastName='User',
+            username=f'seed{seed}_{i}',
+            email=f'seed{seed}_{i}@example.com',
+            phone=f'{seed % 1000:03d}{i:09d}',
+            password=password,
+            tags=','.join(rng.sample(SEED_TAGS, rng.randint(0, 3))),
+            bio=f'Seeded user {i}',
+        ) for i in range(users)], batch_size=batch_size)
+        user_ids = list(range(first_id, first_id + users))
+
+        UserTag.objects.bulk_create([
+            UserTag(user_id=user_id, tag=tag)
+            for user_id, tags in User.objects.filter(id__in=user_ids).values_list('id', 'tags')
+            for tag in tags.split(',') if tag
+        ], batch_size=batch_size, ignore_conflicts=True)
+
+        # popularity order is a random permutation so user ids don't predict degree
+        by_popularity = user_ids[:]
+        rng.shuffle(by_popularity)
+        cum_weights = _zipf_cum_weights(users, exponent)
+
+        edges = set()
+        for follower_id in user_ids:
+            following = min(users - 1, max(0, int(rng.expovariate(1 / avg_following)))) if users > 1 else 0
+            for followee_id in rng.choices(by_popularity, cum_weights=cum_weights, k=following):
+                if followee_id != follower_id:
+                    edges.add((followee_id, follower_id))
+        FollowEdge.objects.bulk_create(
+            [FollowEdge(from_user_id=followee_id, to_user_id=follower_id) for followee_id, follower_id in sorted(edges)],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+
+        owners = rng.choices(by_popularity, cum_weights=cum_weights, k=posts) if users else []
+        Post.objects.bulk_create([Post(
+            name=f'Post {i}',
+            address=f'{i} Seed Street',
+            phone=f'555{i:07d}',
+            imgUrl=f'https://example.com/images/{i}.jpg',
+            owner_id=owner_id,
+            archived=rng.random() < 0.1,
+        ) for i, owner_id in enumerate(owners)], batch_size=batch_size)
+
+        repair_counters(first_id, first_id + users - 1)
+
+    _build_timelines(user_ids)
+    for start in range(0, users, batch_size):
+        store_recommendations(compute_recommendations(user_ids[start:start + batch_size]))
+    return user_ids
+
+
+def _build_timelines(user_ids):
+    following = {}
+    for followee_id, follower_id in FollowEdge.objects.filter(to_user_id__in=user_ids).values_list('from_user_id', 'to_user_id').iterator():
+        following.setdefault(follower_id, []).append(followee_id)
+    for follower_id, followee_ids in following.items():
+        backfill_authors(follower_id, followee_ids)
@@ -1,20 +1,20 @@
 from rest_framework import serializers
 from .models import User
-from django.contrib.auth.hashers import make_password
+from userapp.hashers import hash_password
+from userapp.tags import sync_user_tags
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+
 class UserSignupSerializer(serializers.ModelSerializer):
     tags = serializers.CharField(required=False, allow_blank=True)  # Handle tags as a single string
-    followers = serializers.SerializerMethodField()
-    following = serializers.SerializerMethodField()
     profileImage = serializers.URLField(required=False, allow_blank=True)  # Ensure profileImage is optional
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'password', 'profileImage', 'tags', 'bio', 'followers', 'following']
+        fields = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'password', 'profileImage', 'tags', 'bio']
 
     def create(self, validated_data):
         tags_data = validated_data.pop('tags', '')
@@ -26,25 +26,33 @@ class UserSignupSerializer(serializers.ModelSerializer):
 
         # Hash the password before saving
         if password:
-            validated_data['password'] = make_password(password)
-
-        # Create the user instance
-        user = User.objects.create(**validated_data)
+            validated_data['password'] = hash_password(password)
 
-        # Handle tags as a comma-separated string
-        user.tags = tags_data
-        user.save()
+        # Create the user instance, tags (a comma-separated string) included, in one INSERT
+        user = User.objects.create(tags=tags_data, **validated_data)
+        sync_user_tags(user)
 
         return user
-        
-    def get_followers(self, obj):
-        return [user.username for user in obj.followers.all()]
-
-    def get_following(self, obj):
-        return [user.username for user in obj.following.all()]
 
 
 class UserSerializer(serializers.ModelSerializer):
+
+    def __init__(self, *args, **kwargs):
+        # optional subset of fields to render (e.g. the light user list projection)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # lists render a resized profile image variant (context['image_variant']) when available
+        variant = self.context.get('image_variant')
+        if variant and 'profileImage' in data and variant in instance.profileImageVariants:
+            data['profileImage'] = instance.profileImageVariants[variant]
+        return data
+
     class Meta:
         model = User
-        fields = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'profileImage', 'tags', 'bio', 'followers', 'following']
+        fields = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'profileImage', 'tags', 'bio']
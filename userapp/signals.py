@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from userapp.models import User
+from userapp.cache import PROFILE, IDENTITY, POSTS, invalidate_on_commit
+
+
+# read cache invalidation for users (see userapp.cache)
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    scopes = [PROFILE]
+    if update_fields is None or {'username', 'email'} & set(update_fields):
+        scopes.append(IDENTITY)
+    invalidate_on_commit(scopes, [instance.id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_on_commit([PROFILE, IDENTITY, POSTS], [instance.id])
+
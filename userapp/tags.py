@@ -0,0 +1,40 @@
+from django.db.models import Q
+from userapp.models import User, UserTag
+
+
+# split a comma-separated tags string into unique, lowercased tags
+def normalize_tags(tags):
+    normalized = []
+    for tag in (tags or '').split(','):
+        tag = tag.strip().lower()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+# bring the user's tag index rows in line with user.tags
+def sync_user_tags(user):
+    wanted = set(normalize_tags(user.tags))
+    existing = set(UserTag.objects.filter(user=user).values_list('tag', flat=True))
+
+    if existing - wanted:
+        UserTag.objects.filter(user=user, tag__in=existing - wanted).delete()
+    if wanted - existing:
+        UserTag.objects.bulk_create([UserTag(user=user, tag=tag) for tag in wanted - existing], ignore_conflicts=True)
+
+
+# users having the tag (or a tag starting with it), most followed first
+# after=(followersCount, id) of the last user of the previous page
+def search_users_by_tag(tag, prefix=False, after=None):
+    tag = tag.strip().lower()
+    if prefix:
+        # plain range on the (tag, user) index; LIKE with ESCAPE can't use it on SQLite
+        matches = UserTag.objects.filter(tag__gte=tag, tag__lt=tag + '\uffff')
+    else:
+        matches = UserTag.objects.filter(tag=tag)
+
+    users = User.objects.filter(id__in=matches.values('user_id'))
+    if after is not None:
+        followers_count, user_id = after
+        users = users.filter(Q(followersCount__lt=followers_count) | Q(followersCount=followers_count, id__lt=user_id))
+    return users.order_by('-followersCount', '-id')
@@ -1,3 +1,570 @@
-from django.test import TestCase
+import itertools
+import json
+import logging
+from datetime import timedelta
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.db import connection
+from django.test import AsyncClient, TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from myproject.logs import JsonFormatter
+from myproject import metrics
+from userapp.models import User
+from userapp.follow_graph import FollowEdge, follow_list_page
+from userapp import follows, views
+from userapp.cache import read_cache, cached_read, invalidate, PROFILE
+from userapp.authentication import token_cache
+from userapp.revocation import revocation_list
+from userapp.ratelimit import bucket_store, client_ip
+from userapp.utils import encode_cursor, decode_cursor, get_page_size
+from userapp.tags import sync_user_tags
+from userapp.recommendations import compute_recommendations, store_recommendations
+from userapp.hashers import TunedPBKDF2PasswordHasher
+from userapp.transfer import export_records, import_lines
+from post.models import Post, TimelineEntry
 
-# Create your tests here.
+
+phones = itertools.count(5550000000)
+
+
+def make_user(name, **fields):
+    return User.objects.create(
+        firstName='Test', lastName='User', username=name, email=f'{name}@example.com',
+        phone=str(next(phones)), password='x', **fields,
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+# The follow counters only move when the request itself added or removed the edge
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.client = client_for(self.alice)
+
+    def counters(self):
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        return self.alice.followingCount, self.bob.followersCount
+
+    def test_follow_and_unfollow(self):
+        self.assertEqual(self.client.post('/api/users/follow/', {'userId': self.bob.id}, format='json').status_code, 200)
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.client.post('/api/users/unfollow/', {'userId': self.bob.id}, format='json').status_code, 200)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_follow_of_an_existing_edge_keeps_the_counters(self):
+        # the edge a concurrent request inserted (and counted) first
+        FollowEdge.objects.create(from_user_id=self.bob.id, to_user_id=self.alice.id)
+        response = self.client.post('/api/users/follow/', {'userId': self.bob.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FollowEdge.objects.count(), 1)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_unfollow_of_a_missing_edge_keeps_the_counters(self):
+        User.objects.filter(id=self.alice.id).update(followingCount=1)
+        User.objects.filter(id=self.bob.id).update(followersCount=1)
+        response = self.client.post('/api/users/unfollow/', {'userId': self.bob.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.counters(), (1, 1))
+
+
+# Bulk follow: per-id results, counters moved by the edges actually inserted
+class BulkFollowTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.carol = make_user('carol')
+        self.client = client_for(self.alice)
+
+    def test_per_id_results(self):
+        FollowEdge.objects.create(from_user_id=self.carol.id, to_user_id=self.alice.id)
+        response = self.client.post('/api/users/follow/bulk/', {'userIds': [self.bob.id, self.carol.id, 999999]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['results'], [
+            {'userId': self.bob.id, 'status': 'followed'},
+            {'userId': self.carol.id, 'status': 'already_following'},
+            {'userId': 999999, 'status': 'not_found'},
+        ])
+
+    def test_rejects_non_integer_ids(self):
+        for user_ids in ([True], [1.5], [str(self.bob.id)]):
+            response = self.client.post('/api/users/follow/bulk/', {'userIds': user_ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(FollowEdge.objects.exists())
+
+    def test_follower_is_never_followed(self):
+        response = self.client.post('/api/users/follow/bulk/', {'userIds': [self.alice.id, self.bob.id]}, format='json')
+        self.assertEqual(response.data['data']['results'], [
+            {'userId': self.alice.id, 'status': 'self'},
+            {'userId': self.bob.id, 'status': 'followed'},
+        ])
+        self.assertFalse(FollowEdge.objects.filter(from_user_id=self.alice.id, to_user_id=self.alice.id).exists())
+
+    def test_counts_only_the_inserted_edges(self):
+        bulk_create = FollowEdge.objects.bulk_create
+
+        # ignore_conflicts skips a row, as it does when a concurrent insert of the edge
+        # holds the unique index entry and then rolls back
+        def skip_first(edges, **kwargs):
+            return bulk_create(sorted(edges, key=lambda edge: edge.from_user_id)[1:], **kwargs)
+
+        with mock.patch.object(FollowEdge.objects, 'bulk_create', side_effect=skip_first):
+            results, followed = follows.follow_many(self.alice.id, [self.bob.id, self.carol.id])
+        self.assertEqual(followed, [self.carol.id])
+        self.assertEqual(results, {self.bob.id: 'already_following', self.carol.id: 'followed'})
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.carol.refresh_from_db()
+        self.assertEqual((self.alice.followingCount, self.bob.followersCount, self.carol.followersCount), (1, 0, 1))
+
+
+# Read cache: an entry is dropped as soon as its entity changes
+class ReadCacheTests(TestCase):
+    def setUp(self):
+        read_cache().clear()
+        self.alice = make_user('alice', bio='old')
+        self.client = client_for(self.alice)
+
+    def profile_bio(self):
+        return self.client.get('/api/users/alice/').data['data']['user']['bio']
+
+    def test_save_invalidates_the_cached_profile(self):
+        self.assertEqual(self.profile_bio(), 'old')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.bio = 'new'
+            self.alice.save()
+        self.assertEqual(self.profile_bio(), 'new')
+
+    def test_write_committed_during_load_is_not_cached(self):
+        def load(user_id):
+            payload = {'bio': User.objects.get(id=user_id).bio}
+            # a concurrent write commits (and invalidates) while the payload is built
+            User.objects.filter(id=user_id).update(bio='new')
+            invalidate([PROFILE], [user_id])
+            return payload
+
+        def fresh_load(user_id):
+            return {'bio': User.objects.get(id=user_id).bio}
+
+        resolve = lambda: self.alice.id
+        self.assertEqual(cached_read('test:alice', [PROFILE], resolve, load), {'bio': 'old'})
+        self.assertEqual(cached_read('test:alice', [PROFILE], resolve, fresh_load), {'bio': 'new'})
+
+
+# Logout and refresh rotation revoke tokens, even ones whose payload is cached
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        revocation_list.clear()
+        token_cache.clear()
+        self.alice = make_user('alice')
+        self.refresh = RefreshToken.for_user(self.alice)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def refresh_with(self, raw_refresh):
+        return APIClient().post('/api/token/refresh/', {'refresh': raw_refresh}, format='json')
+
+    def test_revoked_access_token_is_rejected_on_a_cached_payload(self):
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        self.assertEqual(self.client.post('/api/logout/', {'refresh': str(self.refresh)}, format='json').status_code, 200)
+        self.assertEqual(self.client.get('/api/user/').status_code, 401)
+
+    def test_refresh_after_logout(self):
+        self.assertEqual(self.refresh_with(str(self.refresh)).status_code, 200)
+        self.client.post('/api/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(self.refresh_with(str(self.refresh)).status_code, 401)
+
+    def test_rotation_revokes_the_old_refresh_token(self):
+        old_refresh = str(self.refresh)
+        with mock.patch.object(views.jwt_settings, 'ROTATE_REFRESH_TOKENS', True):
+            response = self.refresh_with(old_refresh)
+            self.assertEqual(response.status_code, 200)
+            new_refresh = response.data['data']['refresh']
+            self.assertNotEqual(new_refresh, old_refresh)
+            self.assertEqual(self.refresh_with(old_refresh).status_code, 401)
+            self.assertEqual(self.refresh_with(new_refresh).status_code, 200)
+
+
+# Login attempts are limited per email (settings.RATE_LIMITS), 429 with Retry-After
+class RateLimitTests(TestCase):
+    def setUp(self):
+        bucket_store.clear()
+        self.client = APIClient()
+
+    def login(self, email):
+        return self.client.post('/api/login/', {'email': email, 'password': 'wrong'}, format='json')
+
+    def test_login_is_limited_per_email(self):
+        for _ in range(5):
+            self.assertNotEqual(self.login('alice@example.com').status_code, 429)
+        response = self.login('alice@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # other emails keep their own bucket
+        self.assertNotEqual(self.login('bob@example.com').status_code, 429)
+
+    @override_settings(RATE_LIMIT_PROXY_HOPS=1)
+    def test_spoofed_forwarded_for_keeps_the_bucket(self):
+        for n in range(5):
+            forwarded = f'10.0.0.{n}, 203.0.113.7'
+            self.assertNotEqual(self.client.post('/api/signup/', {}, format='json', HTTP_X_FORWARDED_FOR=forwarded).status_code, 429)
+        response = self.client.post('/api/signup/', {}, format='json', HTTP_X_FORWARDED_FOR='10.0.0.99, 203.0.113.7')
+        self.assertEqual(response.status_code, 429)
+
+    def test_client_ip(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='10.0.0.1, 203.0.113.7, 198.51.100.2', REMOTE_ADDR='192.0.2.1')
+        self.assertEqual(client_ip(request), '192.0.2.1')
+        for hops, expected in ((1, '198.51.100.2'), (2, '203.0.113.7'), (4, '192.0.2.1')):
+            with override_settings(RATE_LIMIT_PROXY_HOPS=hops):
+                self.assertEqual(client_ip(request), expected)
+
+
+# Profile updates keep the tag search index in sync
+class UpdateProfileTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice', tags='go')
+        sync_user_tags(self.alice)
+        self.bob = make_user('bob')
+        self.client = client_for(self.alice)
+
+    def search(self, tag):
+        response = self.client.get(f'/api/users/searchtag/{tag}/')
+        return [user['username'] for user in response.data] if response.status_code == 200 else []
+
+    def test_update_changes_the_tag_search(self):
+        self.assertEqual(self.search('go'), ['alice'])
+        response = self.client.put('/api/users/alice/update-biotag/', {'bio': 'hello', 'tags': 'python, django'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.bio, 'hello')
+        self.assertEqual(self.search('python'), ['alice'])
+        self.assertEqual(self.search('django'), ['alice'])
+        self.assertEqual(self.search('go'), [])
+
+    def test_other_profiles_are_forbidden(self):
+        response = self.client.put('/api/users/bob/update-biotag/', {'bio': 'hello'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+# Login only rehashes a stored password when the configured cost differs from it;
+# the default configuration matches Django's hasher defaults
+class PasswordRehashTests(TestCase):
+    def setUp(self):
+        bucket_store.clear()
+        self.encoded = make_password('secret', hasher=PBKDF2PasswordHasher())
+        self.alice = make_user('alice')
+        User.objects.filter(id=self.alice.id).update(password=self.encoded)
+
+    def login(self):
+        return APIClient().post('/api/login/', {'email': 'alice@example.com', 'password': 'secret'}, format='json')
+
+    def test_default_config_keeps_the_hash(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.password, self.encoded)
+
+    def test_configured_cost_rehashes(self):
+        with mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 1000):
+            self.assertEqual(self.login().status_code, 200)
+        self.alice.refresh_from_db()
+        self.assertTrue(self.alice.password.startswith('pbkdf2_sha256$1000$'))
+
+
+# Users can delete their own account only
+class DeleteUserTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.client = client_for(self.alice)
+
+    def test_delete_own_account(self):
+        self.assertEqual(self.client.delete('/api/delete-user/alice/').status_code, 204)
+        self.assertFalse(User.objects.filter(id=self.alice.id).exists())
+
+    def test_other_accounts_are_forbidden(self):
+        self.assertEqual(self.client.delete('/api/delete-user/bob/').status_code, 403)
+        self.assertEqual(APIClient().delete('/api/delete-user/bob/').status_code, 401)
+        self.assertTrue(User.objects.filter(id=self.bob.id).exists())
+
+
+# Guards the follow edge indexes (migrations 0012, 0013, 0016): each lookup of the
+# through table is a search of one of them, without a sort step
+@skipUnless(connection.vendor == 'sqlite', 'checks the SQLite query plan')
+class FollowEdgeQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [make_user(f'user{i}') for i in range(6)]
+        FollowEdge.objects.bulk_create([
+            FollowEdge(from_user_id=followee.id, to_user_id=follower.id)
+            for follower in cls.users for followee in cls.users if followee != follower
+        ])
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index_name} ', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_followers_page(self):
+        self.assertUsesIndex(follow_list_page(self.users[0].id, 'followers', 1, 20), 'userapp_user_followers_from_id_idx')
+
+    def test_following_page(self):
+        self.assertUsesIndex(follow_list_page(self.users[0].id, 'following', 1, 20), 'userapp_user_followers_to_id_idx')
+
+    # accounts a user follows (fan-out-on-read authors of the feed, recommendations)
+    def test_followed_ids(self):
+        followed = FollowEdge.objects.filter(to_user_id=self.users[0].id).values_list('from_user_id', flat=True)
+        self.assertUsesIndex(followed, 'userapp_user_followers_to_from_idx')
+
+    # followers of an author (fan-out-on-write)
+    def test_follower_ids(self):
+        followers = FollowEdge.objects.filter(from_user_id=self.users[0].id).values_list('to_user_id', flat=True)
+        self.assertUsesIndex(followers, 'userapp_user_followers_from_user_id_to_user_id_e5e7dc97_uniq')
+
+
+# NDJSON export -> import roundtrip: rows come back with their ids and timestamps,
+# written once each, with the counters recomputed from the imported data
+class TransferTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice', tags='music')
+        self.bob = make_user('bob')
+        self.carol = make_user('carol')
+        FollowEdge.objects.bulk_create([
+            FollowEdge(from_user_id=self.alice.id, to_user_id=self.bob.id),
+            FollowEdge(from_user_id=self.alice.id, to_user_id=self.carol.id),
+        ])
+        self.posts = [
+            Post.objects.create(name=f'post {i}', address='address', phone='1', imgUrl='https://example.com/a.png',
+                                owner=self.alice, archived=i == 0)
+            for i in range(2)
+        ]
+        last_year = timezone.now() - timedelta(days=365)
+        User.objects.update(created_at=last_year, updated_at=last_year)
+        Post.objects.update(created_at=last_year, updated_at=last_year)
+        # counters aren't exported, the import recomputes them
+        User.objects.update(followersCount=7, followingCount=7, postsCount=7)
+        # already unusable: the import keeps it instead of hashing it as a plain password
+        User.objects.update(password='!')
+
+    def test_roundtrip(self):
+        users = list(User.objects.order_by('id').values('id', 'username', 'created_at', 'updated_at'))
+        posts = list(Post.objects.order_by('id').values('id', 'owner_id', 'archived', 'created_at', 'updated_at'))
+        lines = [json.dumps(record) for record in export_records()]
+
+        User.objects.all().delete()
+        self.assertFalse(FollowEdge.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            counts = import_lines(lines)
+        self.assertEqual(counts, {'user': 3, 'post': 2, 'follow': 2})
+        # each row is inserted with its timestamps, not updated afterwards
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('UPDATE "post_post"')])
+
+        self.assertEqual(list(User.objects.order_by('id').values('id', 'username', 'created_at', 'updated_at')), users)
+        self.assertEqual(list(Post.objects.order_by('id').values('id', 'owner_id', 'archived', 'created_at', 'updated_at')), posts)
+        self.assertEqual(FollowEdge.objects.filter(from_user_id=self.alice.id).count(), 2)
+        counters = {user.username: (user.followersCount, user.followingCount, user.postsCount) for user in User.objects.all()}
+        self.assertEqual(counters, {'alice': (2, 0, 2), 'bob': (0, 1, 0), 'carol': (0, 1, 0)})
+        # the followers' timelines get the active post
+        self.assertEqual(set(TimelineEntry.objects.values_list('user_id', 'post_id')),
+                         {(self.bob.id, self.posts[1].id), (self.carol.id, self.posts[1].id)})
+
+
+# Keyset pagination of the user list: cursors are opaque, pages never overlap or skip
+class UserListPaginationTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'user{i}') for i in range(5)]
+        self.client = client_for(self.users[0])
+
+    def page(self, **params):
+        response = self.client.get('/api/all-users/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        return [user['id'] for user in data['users']], data['next']
+
+    def all_pages(self, page_size):
+        ids, cursor = self.page(page_size=page_size)
+        while cursor is not None:
+            page, cursor = self.page(page_size=page_size, cursor=cursor)
+            self.assertTrue(page)
+            ids += page
+        return ids
+
+    def test_no_duplicates_or_gaps(self):
+        expected = [user.id for user in self.users]
+        for page_size in (1, 2, 5, 6):
+            self.assertEqual(self.all_pages(page_size), expected)
+
+    def test_stable_across_an_insert(self):
+        first, cursor = self.page(page_size=2)
+        newcomer = make_user('newcomer')
+        rest, cursor = self.page(page_size=10, cursor=cursor)
+        self.assertEqual(first + rest, [user.id for user in self.users] + [newcomer.id])
+
+    def test_bad_cursor(self):
+        for cursor in ('not a cursor', encode_cursor('x'), 'e30'):
+            response = self.client.get('/api/all-users/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+    def test_page_size(self):
+        self.assertEqual(len(self.page(page_size=2)[0]), 2)
+        with override_settings(USER_LIST_MAX_PAGE_SIZE=3):
+            self.assertEqual(len(self.page(page_size=1000)[0]), 3)
+        for page_size in ('0', '-1', 'abc'):
+            self.assertEqual(self.client.get('/api/all-users/', {'page_size': page_size}).status_code, 400)
+
+    def test_cursor_helpers(self):
+        self.assertEqual(decode_cursor(encode_cursor(3, 42)), [3, 42])
+        self.assertIsNone(decode_cursor(''))
+        self.assertEqual(get_page_size({}, 20, 100), 20)
+        self.assertEqual(get_page_size({'page_size': '500'}, 20, 100), 100)
+
+
+# People you may know: mutual follows outweigh shared tags, followed users are left out
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol, self.dave, self.erin, self.frank = [
+            make_user(name, tags=tags) for name, tags in
+            (('alice', 'music'), ('bob', ''), ('carol', ''), ('dave', ''), ('erin', ''), ('frank', 'music'))
+        ]
+        for user in (self.alice, self.frank):
+            sync_user_tags(user)
+        self.follow(self.alice, self.bob, self.carol)
+        self.follow(self.bob, self.dave, self.erin)
+        self.follow(self.carol, self.dave)
+
+    def follow(self, follower, *followees):
+        FollowEdge.objects.bulk_create([FollowEdge(from_user_id=followee.id, to_user_id=follower.id) for followee in followees])
+
+    def test_ranking(self):
+        candidates = compute_recommendations([self.alice.id])[self.alice.id]
+        self.assertEqual([(candidate['userId'], candidate['score']) for candidate in candidates], [
+            (self.dave.id, 4),  # followed by both bob and carol
+            (self.erin.id, 2),  # followed by bob
+            (self.frank.id, 1),  # shares a tag
+        ])
+
+    def test_view_drops_users_followed_since(self):
+        store_recommendations(compute_recommendations([self.alice.id]))
+        self.follow(self.alice, self.dave)
+        response = client_for(self.alice).get('/api/users/recommendations/')
+        self.assertEqual([user['username'] for user in response.data['data']['users']], ['erin', 'frank'])
+
+
+# Log records never carry a password or token: secret keys and token-looking values
+# are redacted wherever they appear
+class LogRedactionTests(TestCase):
+    def format(self, message, **extra):
+        record = logging.LogRecord('userapp.views', logging.WARNING, __file__, 1, message, None, None)
+        record.__dict__.update(extra)
+        return JsonFormatter().format(record)
+
+    def test_secrets_are_redacted(self):
+        access = str(RefreshToken.for_user(make_user('alice')).access_token)
+        line = self.format(
+            f'login with Bearer {access}',
+            password='hunter2',
+            body={'email': 'alice@example.com', 'new_password': 'hunter3', 'refresh': 'r3fresh'},
+            headers=[{'Authorization': 'Bearer s3cret'}],
+            note=f'token {access} sent',
+        )
+        for secret in (access, 'hunter2', 'hunter3', 'r3fresh', 's3cret'):
+            self.assertNotIn(secret, line)
+        self.assertIn('alice@example.com', line)
+
+    def test_view_logs_leave_out_the_token(self):
+        owner = make_user('owner')
+        access = RefreshToken.for_user(owner).access_token
+        post = Post.objects.create(name='post', address='address', phone='1', imgUrl='https://example.com/a.png', owner=owner)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        # the archive view logs the request's JWT payload
+        with self.assertLogs('post', 'DEBUG') as logs:
+            client.patch(f'/api/posts/archive/{post.id}/', {'archived': True}, format='json')
+        lines = [JsonFormatter().format(record) for record in logs.records]
+        self.assertTrue(any('"payload"' in line for line in lines))
+        for line in lines:
+            self.assertNotIn(str(access), line)
+            self.assertNotIn(access['jti'], line)
+
+
+# Request metrics: counted per view, method and status; /metrics only for allowed scrapers
+class MetricsTests(TestCase):
+    def requests_total(self, labels):
+        return metrics.requests_total.series.get(labels, 0)
+
+    def test_requests_are_counted(self):
+        ok = (('view', 'api/checkup/'), ('method', 'GET'), ('status', '200'))
+        unauthorized = (('view', 'api/user/'), ('method', 'GET'), ('status', '401'))
+        before = self.requests_total(ok), self.requests_total(unauthorized)
+        for _ in range(2):
+            self.client.get('/api/checkup/')
+        self.client.get('/api/user/')
+        self.assertEqual((self.requests_total(ok), self.requests_total(unauthorized)), (before[0] + 2, before[1] + 1))
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn(f'http_requests_total{{view="api/checkup/",method="GET",status="200"}} {before[0] + 2}', body)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_scrape_access(self):
+        remote = {'REMOTE_ADDR': '203.0.113.7'}
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', **remote).status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}, **remote).status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}, **remote).status_code, 200)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer '}, **remote).status_code, 403)
+
+
+# ?stream=1 returns the same JSON as the regular response, on the sync and async views
+class StreamingTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'user{i}', tags='music') for i in range(5)]
+        for user in self.users:
+            sync_user_tags(user)
+        Post.objects.bulk_create([
+            Post(name=f'post {i}', address='address', phone='1', imgUrl='https://example.com/a.png', owner=self.users[0])
+            for i in range(3)
+        ])
+        self.token = str(RefreshToken.for_user(self.users[0]).access_token)
+
+    def get(self, path, params):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.streaming, b''.join(response.streaming_content) if response.streaming else response.content
+
+    @async_to_sync
+    async def aget(self, path, params):
+        response = await AsyncClient().get(path, params, headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return True, b''.join([chunk async for chunk in response.streaming_content])
+        return False, response.content
+
+    def test_streamed_bodies_match(self):
+        paths = [
+            ('/all-users/', {'page_size': 100}),
+            ('/users/searchtag/music/', {'page_size': 100}),
+            ('/posts/owner/user0@example.com/', {}),
+        ]
+        for path, params in paths:
+            for prefix, get in (('/api', self.get), ('/api/async', self.aget)):
+                with self.subTest(path=prefix + path):
+                    streaming, plain = get(prefix + path, params)
+                    self.assertFalse(streaming)
+                    streaming, streamed = get(prefix + path, {**params, 'stream': '1'})
+                    self.assertTrue(streaming)
+                    self.assertEqual(json.loads(streamed), json.loads(plain))
+                    self.assertTrue(json.loads(plain))
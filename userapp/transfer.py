@@ -0,0 +1,241 @@
+import itertools
+import json
+from contextlib import contextmanager
+from django.apps import apps
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, identify_hasher, make_password
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from userapp.models import User, UserTag
+from userapp.follow_graph import FollowEdge
+from userapp.counters import repair_counters
+from userapp.tags import normalize_tags
+from userapp.cache import invalidate_on_commit, POSTS
+from post.feed import backfill_authors
+
+
+# NDJSON export and import of users, posts and follow edges: one JSON object per
+# line with a "type" of "user", "post" or "follow". Exports list every user, then
+# every post, then every edge, streamed from the database in chunks, so both
+# directions run in constant memory. Ids are kept, which is what follow edges and
+# post owners refer to. Counters aren't part of the records: the importer
+# recomputes them once, after the last row.
+
+USER_FIELDS = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'password',
+               'profileImageVariants', 'tags', 'bio', 'created_at', 'updated_at']
+POST_FIELDS = ['id', 'owner_id', 'name', 'address', 'phone', 'imgUrl', 'imgVariants', 'archived', 'created_at', 'updated_at']
+TYPES = ('user', 'post', 'follow')
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def _isoformat(row):
+    # full precision (DjangoJSONEncoder would cut datetimes to milliseconds)
+    for field in ('created_at', 'updated_at'):
+        if row[field] is not None:
+            row[field] = row[field].isoformat()
+    return row
+
+
+# records of the given types, ready for json.dumps
+def export_records(types=TYPES, chunk_size=2000):
+    Post = apps.get_model('post', 'Post')
+    if 'user' in types:
+        # profileImage as stored, not as a CloudinaryResource
+        users = User.objects.order_by('id').values(*USER_FIELDS, image=Cast('profileImage', CharField()))
+        for row in users.iterator(chunk_size=chunk_size):
+            row['profileImage'] = row.pop('image')
+            yield {'type': 'user', **_isoformat(row)}
+    if 'post' in types:
+        for row in Post.objects.order_by('id').values(*POST_FIELDS).iterator(chunk_size=chunk_size):
+            row['owner'] = row.pop('owner_id')
+            yield {'type': 'post', **_isoformat(row)}
+    if 'follow' in types:
+        edges = FollowEdge.objects.order_by('id').values_list('from_user_id', 'to_user_id')
+        for followee_id, follower_id in edges.iterator(chunk_size=chunk_size):
+            yield {'type': 'follow', 'followee': followee_id, 'follower': follower_id}
+
+
+# encoded hashes (any hasher in PASSWORD_HASHERS) are stored as they are,
+# anything else is taken as a plain password and hashed (slow, one hash per row)
+def import_password(value):
+    if value.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return value
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return make_password(value)
+    return value
+
+
+def _timestamps(record):
+    return {field: parse_datetime(record[field]) for field in ('created_at', 'updated_at') if record.get(field)}
+
+
+def build_user(record):
+    user = User(
+        id=record['id'],
+        username=record['username'],
+        firstName=record['firstName'],
+        middleName=record.get('middleName'),
+        lastName=record['lastName'],
+        email=record['email'],
+        phone=record['phone'],
+        password=import_password(record['password']),
+        profileImage=record.get('profileImage') or '',
+        profileImageVariants=record.get('profileImageVariants') or {},
+        tags=record.get('tags') or '',
+        bio=record.get('bio'),
+    )
+    return user, _timestamps(record)
+
+
+def build_post(record):
+    Post = apps.get_model('post', 'Post')
+    post = Post(
+        id=record['id'],
+        owner_id=record['owner'],
+        name=record['name'],
+        address=record['address'],
+        phone=record['phone'],
+        imgUrl=record['imgUrl'],
+        imgVariants=record.get('imgVariants') or {},
+        archived=record.get('archived', False),
+    )
+    return post, _timestamps(record)
+
+
+# Buffers parsed records per type and writes them with bulk_create, batch_size rows
+# at a time. Tracks the id range touched so finish() can fix counters, timelines
+# and sequences in one pass.
+class Importer:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.users = []
+        self.posts = []
+        self.edges = []
+        self.counts = dict.fromkeys(TYPES, 0)
+        self.touched = None  # (lowest, highest) user id whose counters may change
+        self.followers = None  # (lowest, highest) follower id of an imported edge
+
+    def add(self, record):
+        kind = record.get('type')
+        if kind == 'user':
+            self.users.append(build_user(record))
+            self._touch(record['id'])
+        elif kind == 'post':
+            self.posts.append(build_post(record))
+            self._touch(record['owner'])
+        elif kind == 'follow':
+            followee_id, follower_id = int(record['followee']), int(record['follower'])
+            if followee_id == follower_id:
+                raise ValueError('a user cannot follow themselves')
+            self.edges.append(FollowEdge(from_user_id=followee_id, to_user_id=follower_id))
+            self._touch(followee_id, follower_id)
+            self.followers = _widen(self.followers, follower_id)
+        else:
+            raise ValueError(f'unknown record type {kind!r}')
+        self.counts[kind] += 1
+
+        if max(len(self.users), len(self.posts), len(self.edges)) >= self.batch_size:
+            self.flush()
+
+    def _touch(self, *user_ids):
+        for user_id in user_ids:
+            self.touched = _widen(self.touched, int(user_id))
+
+    # users first, so posts and edges of the same batch find their users
+    def flush(self):
+        Post = apps.get_model('post', 'Post')
+        if self.users:
+            _bulk_create(User, self.users)
+            UserTag.objects.bulk_create([
+                UserTag(user_id=user.id, tag=tag) for user, _ in self.users for tag in normalize_tags(user.tags)
+            ], ignore_conflicts=True)
+            self.users = []
+        if self.posts:
+            _bulk_create(Post, self.posts)
+            invalidate_on_commit([POSTS], {post.owner_id for post, _ in self.posts})
+            self.posts = []
+        if self.edges:
+            FollowEdge.objects.bulk_create(self.edges, ignore_conflicts=True)
+            self.edges = []
+
+    def finish(self):
+        self.flush()
+        Post = apps.get_model('post', 'Post')
+        # new rows were inserted with explicit ids: move the id sequences past them
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Post]):
+                cursor.execute(sql)
+
+        if self.touched:
+            first_id, last_id = self.touched
+            for start in range(first_id, last_id + 1, self.batch_size):
+                repair_counters(start, start + self.batch_size - 1)
+
+        # home timelines of the imported followers (needs the repaired follower counts)
+        if self.followers:
+            first_id, last_id = self.followers
+            edges = (
+                FollowEdge.objects.filter(to_user_id__gte=first_id, to_user_id__lte=last_id)
+                .order_by('to_user_id', 'from_user_id').values_list('to_user_id', 'from_user_id')
+            )
+            for follower_id, followed in itertools.groupby(edges.iterator(chunk_size=5000), key=lambda edge: edge[0]):
+                backfill_authors(follower_id, [followee_id for _, followee_id in followed])
+
+
+def _widen(bounds, value):
+    return (value, value) if bounds is None else (min(bounds[0], value), max(bounds[1], value))
+
+
+# bulk_create with the exported timestamps (now for rows exported without one):
+# auto_now(_add) is switched off meanwhile so each row is written once, as built.
+# That changes the model's fields for the whole process, which only runs the import.
+@contextmanager
+def _manual_timestamps(model):
+    fields = [model._meta.get_field(name) for name in ('created_at', 'updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _bulk_create(model, rows):
+    now = timezone.now()
+    objects = []
+    for obj, timestamps in rows:
+        obj.created_at = timestamps.get('created_at', now)
+        obj.updated_at = timestamps.get('updated_at', now)
+        objects.append(obj)
+    with _manual_timestamps(model):
+        model.objects.bulk_create(objects)
+
+
+# import an iterable of NDJSON lines in one transaction (nothing is kept when a
+# line is invalid or a row conflicts with existing data), returns {type: rows}
+def import_lines(lines, batch_size=1000):
+    importer = Importer(batch_size)
+    number = 0
+    try:
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    importer.add(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ImportFailed(f'line {number}: {e!r}')
+            importer.finish()
+    except IntegrityError as e:
+        raise ImportFailed(f'batch ending at line {number}: {e}')
+    return importer.counts
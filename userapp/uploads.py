@@ -0,0 +1,147 @@
+import os
+import tempfile
+import uuid
+from functools import partial
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import cloudinary.uploader # type: ignore
+from userapp.models import User, UploadJob
+from userapp.cache import invalidate, PROFILE
+from userapp.pools import BoundedPool
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # without Pillow every variant is the original image
+    Image = None
+
+
+class UploadQueueFull(Exception):
+    pass
+
+
+# Image storage backends: store a local file and return its public url.
+# Selected with settings.IMAGE_STORAGE_BACKEND.
+class CloudinaryImageStorage:
+    def store(self, path):
+        return cloudinary.uploader.upload(path)['url']
+
+
+# Local filesystem stand-in (development and tests), files served from MEDIA_URL
+class LocalImageStorage:
+    def __init__(self):
+        self.storage = FileSystemStorage()
+
+    def store(self, path):
+        with open(path, 'rb') as file:
+            name = self.storage.save(f'images/{uuid.uuid4().hex}{os.path.splitext(path)[1]}', file)
+        return self.storage.url(name)
+
+
+def get_image_storage():
+    return import_string(settings.IMAGE_STORAGE_BACKEND)()
+
+
+# Bounded worker pool: UPLOAD_WORKERS threads and at most UPLOAD_QUEUE_SIZE waiting jobs
+upload_pool = BoundedPool(settings.UPLOAD_WORKERS, settings.UPLOAD_QUEUE_SIZE, UploadQueueFull, 'upload')
+
+
+def submit_job(fn, *args):
+    def run():
+        try:
+            fn(*args)
+        finally:
+            close_old_connections()
+
+    upload_pool.submit(run)
+
+
+# copy the uploaded file to the local spool directory so the request can return
+def spool_upload(file):
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.name)[1], dir=settings.UPLOAD_SPOOL_DIR)
+    with os.fdopen(fd, 'wb') as spooled:
+        for chunk in file.chunks():
+            spooled.write(chunk)
+    return path
+
+
+def update_job(job_id, **fields):
+    UploadJob.objects.filter(id=job_id).update(**fields)
+
+
+# resized, recompressed JPEG copies of the image, one per settings.IMAGE_VARIANTS entry
+def make_variants(path):
+    if Image is None:
+        return {name: path for name in settings.IMAGE_VARIANTS}
+
+    variants = {}
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for name, max_size in settings.IMAGE_VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((max_size, max_size))
+            variant_path = f'{os.path.splitext(path)[0]}-{name}.jpg'
+            variant.save(variant_path, 'JPEG', quality=settings.IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+            variants[name] = variant_path
+    return variants
+
+
+# store every variant of the image, returns {variant name: url}
+def store_variants(job_id, path):
+    storage = get_image_storage()
+    variant_paths = make_variants(path)
+    stored = {}
+    try:
+        for done, variant_path in enumerate(set(variant_paths.values()), start=1):
+            stored[variant_path] = storage.store(variant_path)
+            update_job(job_id, progress=10 + 80 * done // len(variant_paths))
+    finally:
+        for variant_path in variant_paths.values():
+            if variant_path != path and os.path.exists(variant_path):
+                os.remove(variant_path)
+    return {name: stored[variant_path] for name, variant_path in variant_paths.items()}
+
+
+# worker: build and store the variants, then hand their urls to on_stored
+def run_image_upload(job_id, path, on_stored):
+    try:
+        update_job(job_id, status=UploadJob.UPLOADING, progress=10)
+        urls = store_variants(job_id, path)
+        on_stored(urls)
+        update_job(job_id, status=UploadJob.DONE, progress=100, url=urls['full'])
+    except Exception as e:
+        update_job(job_id, status=UploadJob.FAILED, error=str(e)[:255])
+    finally:
+        os.remove(path)
+
+
+# spool the file, record a queued job and hand the upload to the worker pool
+def submit_image_upload(user_id, file, on_stored):
+    path = spool_upload(file)
+    job = UploadJob.objects.create(user_id=user_id)
+    try:
+        submit_job(run_image_upload, job.id, path, on_stored)
+    except UploadQueueFull:
+        job.delete()
+        os.remove(path)
+        raise
+    return job
+
+
+def set_profile_image(user_id, urls):
+    User.objects.filter(id=user_id).update(profileImage=urls['full'], profileImageVariants=urls, updated_at=timezone.now())
+    invalidate([PROFILE], [user_id])
+
+
+def submit_profile_image_upload(user_id, file):
+    return submit_image_upload(user_id, file, partial(set_profile_image, user_id))
+
+
+# url of a profile image variant, falling back to the original image
+def profile_image_url(user, variant='thumbnail'):
+    if variant in user.profileImageVariants:
+        return user.profileImageVariants[variant]
+    return user.profileImage.url if user.profileImage else None
@@ -1,23 +1,43 @@
+from django.conf import settings
 from django.urls import path
 from .views import checkup
-from .views import SignupView, LoginView
+from .views import SignupView, LoginView, TokenRefreshView, LogoutView
 from .views import UserListView, UserByUsername, DeleteUserView, CurrentUserProfileView
 from .views import UpdateUserEmailView, UpdateUserPasswordView, UpdateUserProfileView
 from .views import UploadProfilePictureView, FollowUserView, UnfollowUserView, SearchUsersByTagView
+from .views import UploadJobStatusView, BulkFollowUserView, BulkUnfollowUserView, UserRelationshipView
+from .views import FollowListView, RecommendationsView
+from . import async_views
+
+# the hot read endpoints are served by the native async views when ASYNC_READ_VIEWS is on
+if settings.ASYNC_READ_VIEWS:
+    UserListView = async_views.AsyncUserListView
+    UserByUsername = async_views.AsyncUserByUsername
+    CurrentUserProfileView = async_views.AsyncCurrentUserProfileView
+    SearchUsersByTagView = async_views.AsyncSearchUsersByTagView
 
 urlpatterns = [
     path('checkup/', checkup, name='checkup'),
     path('signup/', SignupView.as_view(), name='signup_user'),
     path('login/', LoginView.as_view(), name='login_user'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout_user'),
     path('all-users/', UserListView.as_view(), name='user-list'),
     path('user/', CurrentUserProfileView.as_view(), name='current_user_profile'),
     path('user/change-email/', UpdateUserEmailView.as_view(), name='update_user_email'),
     path('user/change-password/', UpdateUserPasswordView.as_view(), name='update_user_password'),
     path('users/uploadProfilePicture/', UploadProfilePictureView.as_view(), name='upload_profile_picture'),
+    path('users/uploads/<uuid:job_id>/', UploadJobStatusView.as_view(), name='upload_job_status'),
     path('users/follow/', FollowUserView.as_view(), name='follow_user'),
     path('users/unfollow/', UnfollowUserView.as_view(), name='follow_user'),
+    path('users/follow/bulk/', BulkFollowUserView.as_view(), name='bulk_follow_users'),
+    path('users/unfollow/bulk/', BulkUnfollowUserView.as_view(), name='bulk_unfollow_users'),
+    path('users/recommendations/', RecommendationsView.as_view(), name='user_recommendations'),
+    path('users/<int:id>/relationship/', UserRelationshipView.as_view(), name='user_relationship'),
     path('users/<str:username>/', UserByUsername.as_view(), name='user-by-username'),
     path('delete-user/<str:userName>/', DeleteUserView.as_view(), name='delete-user'),
+    path('users/<str:username>/followers/', FollowListView.as_view(relation='followers'), name='user_followers'),
+    path('users/<str:username>/following/', FollowListView.as_view(relation='following'), name='user_following'),
     path('users/<str:username>/update-biotag/', UpdateUserProfileView.as_view(), name='update_user_profile'),
     path('users/searchtag/<str:tag>/', SearchUsersByTagView.as_view(), name='search_users_by_tag'),
 ]
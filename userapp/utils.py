@@ -1,7 +1,13 @@
+import base64
+import json
+import logging
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
 
 
 def custom_response(success, data=None, error=None, status_code=status.HTTP_200_OK):
@@ -17,29 +23,95 @@ def custom_response(success, data=None, error=None, status_code=status.HTTP_200_
         }, status=status_code)
 
 
-def decode_token(request):
-    # Extract the token from the Authorization header
-    print(request.headers.get('Authorization', None), "auth header")
-    auth_header = request.headers.get('Authorization', None)
-    
-    if not auth_header or not auth_header.startswith('Bearer '):
-        print("Authorization header missing or does not start with 'Bearer'.")
+# Opaque keyset cursors: the ordering values of the last row of a page, base64 encoded
+def encode_cursor(*values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
         return None
-    token = auth_header.split(' ')[1]
-    
-    print(token)
     try:
-        # Decode the token using AccessToken
-        decoded_token = AccessToken(token)
-        print(decode_token, " skjfhkjAFB")
-        payload = decoded_token.payload
-        return payload
-    except InvalidToken:
-        print("Invalid token.")
-        return None
-    except TokenError as e:
-        print(f"Token error: {e}")
-        return None
-    except ValueError as e:
-        print(f"Value error: {e}")
-        return None
\ No newline at end of file
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or not values:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def get_page_size(params, default, maximum):
+    page_size = params.get('page_size')
+    if page_size is None:
+        return default
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError('page_size must be positive')
+    return min(page_size, maximum)
+
+
+# Streaming responses (?stream=1) for the large list endpoints: the rows are read
+# STREAM_CHUNK_SIZE at a time with a chunked iterator() (a server-side cursor on
+# PostgreSQL), serialized one by one and written out a chunk at a time, so memory and
+# time to first byte don't grow with the result. The whole result after the cursor is
+# streamed, without paging.
+def wants_stream(params):
+    return params.get('stream') in ('1', 'true')
+
+
+# compact JSON, as DRF's JSONRenderer writes it
+def dump_json(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+# response with the JSON array [serialize(row), ...] of the queryset, wrapped in prefix and suffix
+def stream_json_array(queryset, serialize, prefix='', suffix=''):
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    # the rows are read after the view and the middleware returned: pick the database
+    # now, while the read replica routing of the request is active
+    queryset = queryset.using(queryset.db)
+
+    def chunks():
+        yield prefix + '['
+        batch = []
+        separator = ''
+        try:
+            for row in queryset.iterator(chunk_size=chunk_size):
+                batch.append(separator + dump_json(serialize(row)))
+                separator = ','
+                if len(batch) >= chunk_size:
+                    yield ''.join(batch)
+                    batch = []
+        except Exception:
+            # the status line is gone: the client gets a truncated body
+            logger.exception('error while streaming a response')
+            raise
+        yield ''.join(batch) + ']' + suffix
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
+
+
+# stream_json_array for the async views: the rows come from aiterator()
+def astream_json_array(queryset, serialize, prefix='', suffix=''):
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    queryset = queryset.using(queryset.db)
+
+    async def chunks():
+        yield prefix + '['
+        batch = []
+        separator = ''
+        try:
+            async for row in queryset.aiterator(chunk_size=chunk_size):
+                batch.append(separator + dump_json(serialize(row)))
+                separator = ','
+                if len(batch) >= chunk_size:
+                    yield ''.join(batch)
+                    batch = []
+        except Exception:
+            logger.exception('error while streaming a response')
+            raise
+        yield ''.join(batch) + ']' + suffix
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
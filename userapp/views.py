@@ -1,17 +1,32 @@
+import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.shortcuts import get_object_or_404
-from django.contrib.auth.hashers import check_password, make_password
+from django.conf import settings
+from django.db import transaction
 from django.http import JsonResponse
-from userapp.models import User
+from userapp.models import User, UploadJob
 from userapp.serializers import UserSignupSerializer, UserLoginSerializer,UserSerializer
 from userapp.utils import custom_response
-from userapp.utils import decode_token
-import cloudinary.uploader # type: ignore
+from userapp.hashers import hash_password, verify_password, HashingBusy
+from userapp.ratelimit import rate_limit_response
+from userapp.revocation import revoke_token, is_revoked
+from userapp.utils import encode_cursor, decode_cursor, get_page_size, wants_stream, stream_json_array, dump_json
+from userapp.tags import sync_user_tags, search_users_by_tag
+from userapp.counters import adjust_counters
+from userapp.cache import cached_read, PROFILE, IDENTITY
+from userapp.uploads import submit_profile_image_upload, profile_image_url, UploadQueueFull
+from userapp.follows import follow_many, unfollow_many, lock_follower
+from userapp.recommendations import get_recommendations, mark_stale
+from userapp.follow_graph import FollowEdge, RELATIONS, load_relationships, follow_list_page
+from post.feed import backfill_author, drop_author, backfill_authors, drop_authors
+
+
+logger = logging.getLogger(__name__)
 
 
 # for checking backend running or not 
@@ -19,12 +34,27 @@ def checkup(request):
     return JsonResponse({"message": "Backend is running successfully"})
 
 
+# every password hashing slot is taken, the client should retry shortly
+def hashing_busy_response():
+    response = custom_response(False, error='Server busy, try again', status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
 # User signup view
 class SignupView(APIView):
     def post(self, request):
+        # rejected before any validation or hashing
+        limited = rate_limit_response(request, 'signup')
+        if limited is not None:
+            return limited
+
         serializer = UserSignupSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except HashingBusy:
+                return hashing_busy_response()
             return custom_response(True, data=UserSignupSerializer(user).data, status_code=status.HTTP_201_CREATED)
         return custom_response(False, error=serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
 
@@ -32,6 +62,12 @@ class SignupView(APIView):
 # User login view with jwt verification
 class LoginView(APIView):
     def post(self, request):
+        # rejected before any database lookup or hash check
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        limited = rate_limit_response(request, 'login', email=email)
+        if limited is not None:
+            return limited
+
         serializer = UserLoginSerializer(data=request.data)
         
         if serializer.is_valid():
@@ -40,7 +76,13 @@ class LoginView(APIView):
 
             try:
                 user = User.objects.get(email=email)
-                if check_password(password, user.password):  
+                outdated_hash = []
+                if verify_password(password, user.password, outdated_hash.append):
+                    # upgrade the stored hash when the hasher or its parameters changed
+                    if outdated_hash:
+                        user.password = hash_password(password)
+                        user.save(update_fields=['password', 'updated_at'])
+
                     refresh = RefreshToken.for_user(user)
                     access_token = str(refresh.access_token)
                     refresh_token = str(refresh)
@@ -56,84 +98,184 @@ class LoginView(APIView):
                     return custom_response(False, error='Password Incorrect!', status_code=status.HTTP_401_UNAUTHORIZED)
             except User.DoesNotExist:
                 return custom_response(False, error='User not found!', status_code=status.HTTP_404_NOT_FOUND)
+            except HashingBusy:
+                return hashing_busy_response()
         
         return custom_response(False, error=serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
     
 
-# User list view with JWT verification
+# New access token for a refresh token: no password check and a single database
+# lookup (the account must still exist)
+class TokenRefreshView(APIView):
+    def post(self, request):
+        raw_refresh = request.data.get('refresh') if hasattr(request.data, 'get') else None
+        if not raw_refresh:
+            return custom_response(False, error='refresh is required', status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            refresh = RefreshToken(raw_refresh)
+        except TokenError:
+            return custom_response(False, error='Invalid or expired refresh token', status_code=status.HTTP_401_UNAUTHORIZED)
+        if is_revoked(refresh.payload):
+            return custom_response(False, error='Invalid or expired refresh token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        if not User.objects.filter(id=refresh[jwt_settings.USER_ID_CLAIM]).exists():
+            return custom_response(False, error='User not found', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                revoke_token(refresh.payload)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return custom_response(True, data=data, status_code=status.HTTP_200_OK)
+
+
+# Logout: revokes the request's access token and the refresh token in the body
+class LogoutView(APIView):
+    def post(self, request):
+        payload = request.jwt_payload
+        raw_refresh = request.data.get('refresh') if hasattr(request.data, 'get') else None
+
+        refresh = None
+        if raw_refresh:
+            try:
+                refresh = RefreshToken(raw_refresh)
+            except TokenError:
+                pass  # already expired, nothing to revoke
+
+        if payload is None and refresh is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+        if payload is not None and refresh is not None and str(refresh[jwt_settings.USER_ID_CLAIM]) != str(payload['user_id']):
+            return custom_response(False, error='Refresh token belongs to another user', status_code=status.HTTP_403_FORBIDDEN)
+
+        if payload is not None:
+            revoke_token(payload)
+        if refresh is not None:
+            revoke_token(refresh.payload)
+        return custom_response(True, data='Logged out successfully', status_code=status.HTTP_200_OK)
+
+
+# User list view with JWT verification, keyset paginated on id
+# ?cursor=<next> continues a listing, ?page_size=N sets the page length
+# and ?image=medium|full picks the profile image variant (thumbnail by default)
 class UserListView(generics.ListAPIView):
+    read_replica = True
     serializer_class = UserSerializer
+    light_fields = ['id', 'username', 'firstName', 'middleName', 'lastName', 'email', 'phone', 'profileImage', 'tags', 'bio']
 
     def get(self, request):
-        # Decode the JWT token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         # check the token ki yeh valid hai ki nhi 
         if payload is None:
             return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
-        
-        # fetching the userlist
-        queryset = User.objects.all()
-        serializer = self.get_serializer(queryset, many=True)
-        return custom_response(True, data={'users': serializer.data, 'payload': payload}, status_code=status.HTTP_200_OK)
+
+        try:
+            cursor = decode_cursor(request.query_params.get('cursor'))
+            after_id = int(cursor[0]) if cursor else None
+            page_size = get_page_size(request.query_params, settings.USER_LIST_PAGE_SIZE, settings.USER_LIST_MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return custom_response(False, error='Invalid cursor or page_size', status_code=status.HTTP_400_BAD_REQUEST)
+
+        # fetching one page of the userlist, only the columns we render
+        queryset = User.objects.only(*self.light_fields, 'profileImageVariants').order_by('id')
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+
+        image_variant = request.query_params.get('image', 'thumbnail')
+        context = {**self.get_serializer_context(), 'image_variant': image_variant}
+
+        # ?stream=1: every user after the cursor, same body without paging
+        if wants_stream(request.query_params):
+            serializer = self.get_serializer(fields=self.light_fields, context=context)
+            prefix = '{"success":true,"data":{"payload":' + dump_json(payload) + ',"next":null,"users":'
+            return stream_json_array(queryset, serializer.to_representation, prefix=prefix, suffix='}}')
+
+        users = list(queryset[:page_size + 1])
+        next_cursor = encode_cursor(users[page_size - 1].id) if len(users) > page_size else None
+        users = users[:page_size]
+
+        serializer = self.get_serializer(users, many=True, fields=self.light_fields, context=context)
+        return custom_response(True, data={'users': serializer.data, 'next': next_cursor, 'payload': payload}, status_code=status.HTTP_200_OK)
 
 
 # user by username view with jwt verification
 class UserByUsername(APIView):
+    read_replica = True
+
     def get(self, request, username):
         # print(username)
-        payload = decode_token(request)
+        payload = request.jwt_payload
         # print("Payload : ",payload)
         if payload is None:
             return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
         
         # print("username is : ", username)
-        try:
-            user = User.objects.get(username=username)
-            serializer = UserSerializer(user)
-            return custom_response(True, data={'user': serializer.data, 'payload': payload}, status_code=status.HTTP_200_OK)
-        except User.DoesNotExist:
+        def resolve():
+            return User.objects.filter(username=username).values_list('id', flat=True).first()
+
+        def load(user_id):
+            user = User.objects.filter(id=user_id, username=username).first()
+            return UserSerializer(user).data if user else None
+
+        # serialized profile from the read cache, valid until the user changes
+        user_data = cached_read(f'profile:username:{username}', [PROFILE, IDENTITY], resolve, load)
+        if user_data is None:
             return custom_response(False, error=f'User not found. Payload: {payload}', status_code=status.HTTP_404_NOT_FOUND)
+        return custom_response(True, data={'user': user_data, 'payload': payload}, status_code=status.HTTP_200_OK)
 
 
-# Delete user view
+# Delete user view, users can only delete their own account
 class DeleteUserView(APIView):
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated]
+    def delete(self, request, userName):
+        payload = request.jwt_payload
 
-    def delete(self, request, username):
-        try:
-            user = get_object_or_404(User, username=username)
-            user.delete()
-            return custom_response(True, data=None, status_code=status.HTTP_204_NO_CONTENT)
-        except User.DoesNotExist:
-            return custom_response(False, error=f"User '{username}' not found", status_code=status.HTTP_404_NOT_FOUND)
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        user = User.objects.filter(username=userName).first()
+        if user is None:
+            return custom_response(False, error=f"User '{userName}' not found", status_code=status.HTTP_404_NOT_FOUND)
+        if user.id != int(payload['user_id']):
+            return custom_response(False, error='You are not authorized to delete this user', status_code=status.HTTP_403_FORBIDDEN)
+
+        user.delete()
+        return custom_response(True, data=None, status_code=status.HTTP_204_NO_CONTENT)
 
 
 # Current User profile view with jwt verification
 class CurrentUserProfileView(APIView):
+    read_replica = True
+
     def get(self, request):
-        # decoding jwt token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
   
         if payload is None:
             return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
         
-        try:
+        def load(user_id):
             # Get the current user using the user_id from the token payload
-            user = User.objects.get(id=payload['user_id'])
-            serializer = UserSerializer(user)
-            return custom_response(True, data={'user': serializer.data, 'payload': payload}, status_code=status.HTTP_200_OK)
-        except User.DoesNotExist:
+            user = User.objects.filter(id=user_id).first()
+            return UserSerializer(user).data if user else None
+
+        # serialized profile from the read cache, valid until the user changes
+        user_data = cached_read(f"profile:id:{payload['user_id']}", [PROFILE], lambda: int(payload['user_id']), load)
+        if user_data is None:
             return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
+        return custom_response(True, data={'user': user_data, 'payload': payload}, status_code=status.HTTP_200_OK)
 
 
 # Update email view for current user with jwt verification
 class UpdateUserEmailView(APIView):
     def put(self, request):
-        # Decode the JWT token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         # Check if the token is valid
         if payload is None:
@@ -153,7 +295,7 @@ class UpdateUserEmailView(APIView):
 
             # Update the user's email
             user.email = new_email
-            user.save()
+            user.save(update_fields=['email', 'updated_at'])
 
             # Serialize the updated user and return the response
             serializer = UserSerializer(user)
@@ -166,8 +308,8 @@ class UpdateUserEmailView(APIView):
 # Update password view for the current user with jwt verification
 class UpdateUserPasswordView(APIView):
     def put(self, request):
-        # Decode the JWT token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         # Check if the token is valid
         if payload is None:
@@ -184,24 +326,26 @@ class UpdateUserPasswordView(APIView):
                 return custom_response(False, error='Current and new passwords are required', status_code=status.HTTP_400_BAD_REQUEST)
 
             # Check if the current password is correct
-            if not check_password(current_password, user.password):
+            if not verify_password(current_password, user.password):
                 return custom_response(False, error='Current password is incorrect', status_code=status.HTTP_400_BAD_REQUEST)
 
             # Update the user's password (after hashing it)
-            user.password = make_password(new_password)
-            user.save()
+            user.password = hash_password(new_password)
+            user.save(update_fields=['password', 'updated_at'])
 
             return custom_response(True, data='Password updated successfully', status_code=status.HTTP_200_OK)
         
         except User.DoesNotExist:
             return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
+        except HashingBusy:
+            return hashing_busy_response()
 
 
 # Update bio and tag for the current user with jwt verification
 class UpdateUserProfileView(APIView):
     def put(self, request, username):
 
-        payload = decode_token(request)
+        payload = request.jwt_payload
         
         if payload is None:
             return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
@@ -211,7 +355,7 @@ class UpdateUserProfileView(APIView):
             user = User.objects.get(username=username)
             
             # Ensure that the user updating the profile is allowed to or not
-            if user.id != payload['user_id']:
+            if user.id != int(payload['user_id']):
                 return custom_response(False, error='You are not authorized to update this profile', status_code=status.HTTP_403_FORBIDDEN)
             
             bio = request.data.get('bio')
@@ -227,7 +371,12 @@ class UpdateUserProfileView(APIView):
                 user.tags = ','.join(tag.strip() for tag in tags_data.split(','))
             
             # Save the updated user profile
-            user.save()
+            user.save(update_fields=['bio', 'tags', 'updated_at'])
+
+            # keep the tag search index in sync
+            if tags_data:
+                sync_user_tags(user)
+                mark_stale([user.id])
 
             # Serialize the updated user profile
             serializer = UserSerializer(user)
@@ -238,11 +387,12 @@ class UpdateUserProfileView(APIView):
             return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
 
 
-# profile picture uploading using cloudinary
+# profile picture uploading: the file is spooled locally and uploaded to the
+# image storage (cloudinary) by a background worker, poll the returned job id
 class UploadProfilePictureView(APIView):
     def post(self, request):
-        # Decode the JWT token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         
         # Check if the token is valid
         if payload is None:
@@ -250,7 +400,8 @@ class UploadProfilePictureView(APIView):
 
         try:
             # Get the current user from the token payload
-            user = User.objects.get(id=payload['user_id'])
+            if not User.objects.filter(id=payload['user_id']).exists():
+                return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
 
             # Retrieve the uploaded file
             file = request.FILES.get('profileImage')
@@ -258,27 +409,40 @@ class UploadProfilePictureView(APIView):
             if not file:
                 return custom_response(False, error='No file uploaded', status_code=status.HTTP_400_BAD_REQUEST)
 
-            # Upload the file to Cloudinary
-            upload_result = cloudinary.uploader.upload(file)
-            profile_image_url = upload_result['url']
-
-            # Update the user's profile image
-            user.profileImage = profile_image_url
-            user.save()
-
-            return custom_response(True, data={'profileImage': user.profileImage}, status_code=status.HTTP_200_OK)
+            job = submit_profile_image_upload(payload['user_id'], file)
+            return custom_response(True, data={'jobId': str(job.id), 'status': job.status}, status_code=status.HTTP_202_ACCEPTED)
 
-        except User.DoesNotExist:
-            return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
+        except UploadQueueFull:
+            return custom_response(False, error='Upload queue is full, try again later', status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
-            print(f'Error uploading profile picture: {e}')
+            logger.exception('error uploading profile picture', extra={'user_id': payload['user_id']})
             return custom_response(False, error='Error uploading profile picture', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# profile picture upload status for the current user
+class UploadJobStatusView(APIView):
+    def get(self, request, job_id):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        job = UploadJob.objects.filter(id=job_id, user_id=payload['user_id']).first()
+        if job is None:
+            return custom_response(False, error='Upload not found', status_code=status.HTTP_404_NOT_FOUND)
+
+        data = {'jobId': str(job.id), 'status': job.status, 'progress': job.progress}
+        if job.status == UploadJob.DONE:
+            data['profileImage'] = job.url
+        if job.status == UploadJob.FAILED:
+            data['error'] = job.error
+        return custom_response(True, data=data, status_code=status.HTTP_200_OK)
+
+
 # follow user view with jwt implementation
 class FollowUserView(APIView):
     def post(self, request):
-        payload = decode_token(request)
+        payload = request.jwt_payload
 
         if payload is None:
             return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
@@ -295,17 +459,21 @@ class FollowUserView(APIView):
         current_user = get_object_or_404(User, id=current_user_id)
         user_to_follow = get_object_or_404(User, id=user_to_follow_id)
 
-        if user_to_follow in current_user.following.all():
-            return custom_response(False, error='Already following this user', status_code=status.HTTP_400_BAD_REQUEST)
-
-        # Update following and followers lists
-        current_user.following.add(user_to_follow)
-        current_user.followingCount += 1
-        current_user.save()
-
-        user_to_follow.followers.add(current_user)
-        user_to_follow.followersCount += 1
-        user_to_follow.save()
+        # Add the follow edge (one row, shared by both users' lists) and bump the counters atomically,
+        # only when this request created the edge (a concurrent follow may have won the race)
+        with transaction.atomic():
+            lock_follower(current_user.id)
+            _, created = FollowEdge.objects.get_or_create(from_user_id=user_to_follow.id, to_user_id=current_user.id)
+            if not created:
+                return custom_response(False, error='Already following this user', status_code=status.HTTP_400_BAD_REQUEST)
+            adjust_counters([current_user.id], followingCount=1)
+            adjust_counters([user_to_follow.id], followersCount=1)
+            mark_stale([current_user.id])
+        current_user.refresh_from_db(fields=['followingCount'])
+        user_to_follow.refresh_from_db(fields=['followersCount'])
+
+        # seed the home feed with the followed user's recent posts
+        backfill_author(current_user.id, user_to_follow.id)
 
         return custom_response(
             True,
@@ -322,7 +490,7 @@ class FollowUserView(APIView):
 # Unfollow user view with jwt implementation
 class UnfollowUserView(APIView):
     def post(self, request):
-        payload = decode_token(request)
+        payload = request.jwt_payload
         
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -335,21 +503,20 @@ class UnfollowUserView(APIView):
             user_to_unfollow = get_object_or_404(User, id=user_id)
             current_user = get_object_or_404(User, id=current_user_id)
 
-            # Get the list of IDs that the current user is following
-            following_ids = current_user.following.values_list('id', flat=True)
-
-            # Check if the current user is not following the target user
-            if user_to_unfollow.id not in following_ids:
-                return Response({'success': False, 'error': 'Not following this user'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Update both users' following and followers lists
-            current_user.following.remove(user_to_unfollow)
-            current_user.followingCount -= 1
-            current_user.save()
-
-            user_to_unfollow.followers.remove(current_user)
-            user_to_unfollow.followersCount -= 1
-            user_to_unfollow.save()
+            # Remove the follow edge and decrement both counters atomically,
+            # only when this request deleted the edge
+            with transaction.atomic():
+                lock_follower(current_user.id)
+                deleted, _ = FollowEdge.objects.filter(from_user_id=user_to_unfollow.id, to_user_id=current_user.id).delete()
+                if not deleted:
+                    return Response({'success': False, 'error': 'Not following this user'}, status=status.HTTP_400_BAD_REQUEST)
+                adjust_counters([current_user.id], followingCount=-1)
+                adjust_counters([user_to_unfollow.id], followersCount=-1)
+                mark_stale([current_user.id])
+            current_user.refresh_from_db(fields=['followingCount'])
+            user_to_unfollow.refresh_from_db(fields=['followersCount'])
+
+            drop_author(current_user.id, user_to_unfollow.id)
 
             return Response({
                 'success': True,
@@ -360,44 +527,234 @@ class UnfollowUserView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            print(f"Error unfollowing user: {e}")
+            logger.exception('error unfollowing user', extra={'user_id': current_user_id, 'target_id': user_id})
             return Response({'success': False, 'error': 'Server Error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# list of user ids from request.data['userIds'], raises ValueError when invalid
+def parse_user_ids(user_ids):
+    if not isinstance(user_ids, list) or not user_ids or len(user_ids) > settings.FOLLOW_BULK_MAX_IDS:
+        raise ValueError(f'userIds must be a list of 1 to {settings.FOLLOW_BULK_MAX_IDS} ids')
+    # JSON integers only: int() would also take true, 1.5 and "1"
+    if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+        raise ValueError('userIds must be a list of integer ids')
+    return list(dict.fromkeys(user_ids))
+
+
+# Bulk follow: {"userIds": [...]}, resolved and written in one transaction
+class BulkFollowUserView(APIView):
+    def post(self, request):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            user_ids = parse_user_ids(request.data.get('userIds'))
+        except ValueError as e:
+            return custom_response(False, error=str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        current_user_id = int(payload['user_id'])
+        results, followed_ids = follow_many(current_user_id, user_ids)
+
+        # seed the home feed with the followed users' recent posts
+        if followed_ids:
+            backfill_authors(current_user_id, followed_ids)
+
+        return custom_response(
+            True,
+            data={
+                'message': f'Followed {len(followed_ids)} users',
+                'results': [{'userId': user_id, 'status': results[user_id]} for user_id in user_ids],
+                'followingCount': User.objects.filter(id=current_user_id).values_list('followingCount', flat=True).first(),
+            },
+            status_code=status.HTTP_200_OK
+        )
+
+
+# Bulk unfollow: {"userIds": [...]}, resolved and written in one transaction
+class BulkUnfollowUserView(APIView):
+    def post(self, request):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            user_ids = parse_user_ids(request.data.get('userIds'))
+        except ValueError as e:
+            return custom_response(False, error=str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        current_user_id = int(payload['user_id'])
+        results, unfollowed_ids = unfollow_many(current_user_id, user_ids)
+
+        if unfollowed_ids:
+            drop_authors(current_user_id, unfollowed_ids)
+
+        return custom_response(
+            True,
+            data={
+                'message': f'Unfollowed {len(unfollowed_ids)} users',
+                'results': [{'userId': user_id, 'status': results[user_id]} for user_id in user_ids],
+                'followingCount': User.objects.filter(id=current_user_id).values_list('followingCount', flat=True).first(),
+            },
+            status_code=status.HTTP_200_OK
+        )
+
+
+# Follow relationship of a user with up to RELATIONSHIP_MAX_IDS others: ?ids=1,2,3
+class UserRelationshipView(APIView):
+    def get(self, request, id):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            target_ids = list(dict.fromkeys(int(target_id) for target_id in request.query_params.get('ids', '').split(',')))
+        except ValueError:
+            return custom_response(False, error='ids must be a comma separated list of user ids', status_code=status.HTTP_400_BAD_REQUEST)
+        if len(target_ids) > settings.RELATIONSHIP_MAX_IDS:
+            return custom_response(False, error=f'At most {settings.RELATIONSHIP_MAX_IDS} ids', status_code=status.HTTP_400_BAD_REQUEST)
+
+        if not User.objects.filter(id=id).exists():
+            return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
+
+        relationships = load_relationships(id, target_ids)
+        return custom_response(
+            True,
+            data={
+                'userId': id,
+                'relationships': [{'userId': target_id, **relationships[target_id]} for target_id in target_ids],
+            },
+            status_code=status.HTTP_200_OK
+        )
+
+
+# Followers or following of a user, keyset paginated on the follow edge id
+# ?cursor=<next> continues a listing, ?page_size=N sets the page length
+class FollowListView(APIView):
+    read_replica = True
+    relation = None
+
+    def get(self, request, username):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            cursor = decode_cursor(request.query_params.get('cursor'))
+            after_id = int(cursor[0]) if cursor else None
+            page_size = get_page_size(request.query_params, settings.FOLLOW_LIST_PAGE_SIZE, settings.FOLLOW_LIST_MAX_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return custom_response(False, error='Invalid cursor or page_size', status_code=status.HTTP_400_BAD_REQUEST)
+
+        user_id = User.objects.filter(username=username).values_list('id', flat=True).first()
+        if user_id is None:
+            return custom_response(False, error='User not found', status_code=status.HTTP_404_NOT_FOUND)
+
+        edges = list(follow_list_page(user_id, self.relation, after_id, page_size + 1))
+        next_cursor = encode_cursor(edges[page_size - 1].id) if len(edges) > page_size else None
+
+        other = RELATIONS[self.relation][1]
+        users = [getattr(edge, other) for edge in edges[:page_size]]
+        user_data = [{
+            'id': user.id,
+            'username': user.username,
+            'profileImage': profile_image_url(user, 'thumbnail'),
+        } for user in users]
+        return custom_response(True, data={self.relation: user_data, 'next': next_cursor}, status_code=status.HTTP_200_OK)
+
+
+# "People you may know" for the current user, served from the precomputed list
+class RecommendationsView(APIView):
+    def get(self, request):
+        payload = request.jwt_payload
+
+        if payload is None:
+            return custom_response(False, error='Invalid or missing token', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        current_user_id = int(payload['user_id'])
+        candidates = get_recommendations(current_user_id)
+        candidate_ids = [candidate['userId'] for candidate in candidates]
+
+        # drop users followed (or deleted) since the list was computed
+        followed = set(FollowEdge.objects.filter(to_user_id=current_user_id, from_user_id__in=candidate_ids).values_list('from_user_id', flat=True))
+        users = User.objects.filter(id__in=candidate_ids).only('id', 'username', 'profileImage', 'profileImageVariants', 'bio').in_bulk()
+
+        recommendations = [{
+            'id': candidate['userId'],
+            'username': users[candidate['userId']].username,
+            'profileImage': profile_image_url(users[candidate['userId']], 'thumbnail'),
+            'bio': users[candidate['userId']].bio,
+            'mutuals': candidate['mutuals'],
+            'sharedTags': candidate['sharedTags'],
+        } for candidate in candidates if candidate['userId'] in users and candidate['userId'] not in followed]
+        return custom_response(True, data={'users': recommendations}, status_code=status.HTTP_200_OK)
+
+
 # Search User by tag view with jwt implemented
+# profile images are the thumbnail variant unless ?image=medium|full
 class SearchUsersByTagView(APIView):
+    read_replica = True
+
     def get(self, request, tag):
-        # Decode the JWT token
-        payload = decode_token(request)
+        # JWT payload, verified once per request by JWTPayloadMiddleware
+        payload = request.jwt_payload
         if payload is None:
             return Response({'success': False, 'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        print('Received tag:', tag)
+        logger.debug('tag search requested', extra={'tag': tag})
 
         if not tag:
             return Response({'message': 'Tag is required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            users = User.objects.filter(tags__icontains=tag)
+            cursor = decode_cursor(request.query_params.get('cursor'))
+            after = (int(cursor[0]), int(cursor[1])) if cursor else None
+            page_size = get_page_size(request.query_params, settings.TAG_SEARCH_PAGE_SIZE, settings.TAG_SEARCH_MAX_PAGE_SIZE)
+        except (TypeError, ValueError, IndexError):
+            return Response({'message': 'Invalid cursor or page_size'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if not users.exists():
-                return Response({'message': 'No users found with this tag'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            # exact tag match by default, ?match=prefix for tags starting with it
+            prefix = request.query_params.get('match') == 'prefix'
+            image_variant = request.query_params.get('image', 'thumbnail')
 
-            user_data = []
-            for user in users:
-                user_data.append({
+            def user_row(user):
+                return {
                     'id': user.id,
                     'username': user.username,
-                    'profileImage': user.profileImage.url if user.profileImage else None,
+                    'profileImage': profile_image_url(user, image_variant),
                     'followersCount': user.followersCount,
                     'followingCount': user.followingCount,
                     'bio': user.bio,
-                })
+                }
+
+            # ?stream=1: every match after the cursor, no X-Next-Cursor
+            if wants_stream(request.query_params):
+                matches = search_users_by_tag(tag, prefix=prefix, after=after)
+                if after is None and not matches.exists():
+                    return Response({'message': 'No users found with this tag'}, status=status.HTTP_404_NOT_FOUND)
+                return stream_json_array(matches, user_row)
+
+            users = list(search_users_by_tag(tag, prefix=prefix, after=after)[:page_size + 1])
+
+            if not users and after is None:
+                return Response({'message': 'No users found with this tag'}, status=status.HTTP_404_NOT_FOUND)
+
+            user_data = [user_row(user) for user in users[:page_size]]
 
-            return Response(user_data, status=status.HTTP_200_OK)
+            # the next page cursor goes in a header so the response body stays a plain list
+            response = Response(user_data, status=status.HTTP_200_OK)
+            if len(users) > page_size:
+                last = users[page_size - 1]
+                response['X-Next-Cursor'] = encode_cursor(last.followersCount, last.id)
+            return response
 
         except Exception as error:
-            print('Error searching users by tag:', error)
+            logger.exception('error searching users by tag', extra={'tag': tag})
             return Response({'message': 'Server error', 'error': str(error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 